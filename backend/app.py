@@ -1,18 +1,84 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
+import contextlib
+import json
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
+import threading
 
 from services.llm_service import LLMService
-from mcp_tools import get_all_tools
+from services.session_store import SessionStore
+from services.metrics import metrics, span, start_trace
+from mcp_tools import get_all_tools, select_tools, RAG_ENABLED
+from mcp_tools.db_tools import get_cache_stats
+from mcp_tools.search_tools import get_vector_store, get_index_queue
+from services.vector_store import INDEXABLE_EXTENSIONS
 
 load_dotenv()
 
 app = FastAPI(title="LLM Data Copilot")
 
+class UploadSizeLimit:
+    """Refuse uploads over UPLOAD_MAX_BYTES as the body arrives, before multipart parsing spools it to disk
+
+    Bodies with a larger Content-Length are rejected without reading them;
+    chunked bodies are cut off as soon as they pass the limit. save_upload
+    still enforces the exact limit on the file itself.
+    """
+
+    def __init__(self, app, path: str = "/api/upload"):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        limit = UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD
+        too_large = JSONResponse(
+            {"success": False, "error": f"File too large (max {UPLOAD_MAX_BYTES // (1024 * 1024)}MB)"},
+            status_code=413
+        )
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received, exceeded, replied = 0, False, False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True  # The form parser sees a disconnect and stops reading
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message):
+            nonlocal replied
+            if not exceeded:
+                await send(message)
+            elif not replied:
+                replied = True  # Whatever the endpoint answered, the client gets the 413
+                await too_large(scope, receive, send)
+
+        await self.app(scope, limited_receive, limited_send)
+
+app.add_middleware(UploadSizeLimit)
+
 
 # CORS for Next.js frontend
 app.add_middleware(
@@ -26,46 +92,241 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optional semantic answer cache, reusing the vector store's embedding model
+answer_cache = None
+if os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true":
+    from services.answer_cache import AnswerCache
+    answer_cache = AnswerCache(model_loader=lambda: get_vector_store().model)
+
 # Initialize LLM service
 llm_service = LLMService(
     api_key=os.getenv("GROQ_API_KEY"),
-    model="llama-3.3-70b-versatile"
+    model="llama-3.3-70b-versatile",
+    answer_cache=answer_cache
 )
 
+# Server-side conversation sessions
+session_store = SessionStore()
+
+# Uploads are copied to disk in fixed-size chunks, so memory use doesn't grow with file size
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # Multipart boundaries and part headers around the file
+
+# Request metrics, scraped from /metrics
+CHAT_REQUESTS = metrics.counter("copilot_chat_requests_total", "Chat requests by endpoint and outcome", ("endpoint", "outcome"))
+CHAT_SECONDS = metrics.histogram("copilot_chat_request_seconds", "End-to-end chat request time", ("endpoint",))
+metrics.gauge("copilot_sessions", "Live server-side sessions", lambda: session_store.stats()["entries"])
+metrics.gauge("copilot_query_cache_entries", "Cached sqlite_query pages", lambda: get_cache_stats()["entries"])
+metrics.gauge("copilot_query_cache_hit_rate", "sqlite_query result cache hit rate", lambda: get_cache_stats()["hit_rate"])
+metrics.gauge("copilot_index_jobs", "Index jobs in history by status", lambda: get_index_queue().stats()["jobs"], ("status",))
+
+# Cold-start measurements, reported by /ready
+STARTUP_TIMINGS = {"app_import_s": round(time.perf_counter() - _import_started, 3)}
+
+@app.on_event("startup")
+async def startup():
+    # Warm the embedding model in the background; the server is ready immediately
+    if RAG_ENABLED or answer_cache is not None:
+        threading.Thread(target=get_vector_store().warm_up, name="vector-store-warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await llm_service.aclose()
+    get_index_queue().close()
+
 class ChatRequest(BaseModel):
     message: str
+    # Send session_id to have the server keep history; conversation_history is the stateless fallback
+    session_id: Optional[str] = None
     conversation_history: List[Dict[str, str]] = []
+    # Return per-phase timings and token counts with the response
+    trace: bool = False
 
 class ChatResponse(BaseModel):
     response: str
     tool_calls: List[Dict[str, Any]] = []
+    session_id: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
+
+def resolve_session(request: ChatRequest):
+    """Pick the session, or None for the stateless conversation_history fallback"""
+    if request.session_id is None and request.conversation_history:
+        return None
+    return session_store.get_or_create(request.session_id)
+
+def session_turn(session):
+    """Run one turn at a time per session; read its history inside, so turns don't interleave"""
+    return session.turn_lock if session is not None else contextlib.nullcontext()
+
+def session_history(request: ChatRequest, session) -> List[Dict[str, str]]:
+    return session_store.history(session) if session is not None else request.conversation_history
+
+def remember_turn(session, message: str, result: Dict[str, Any]):
+    """Add a turn to the session's history, unless it failed (an "Error: ..." reply isn't context)"""
+    if session is not None and not result.get("error"):
+        session_store.append(session, message, result["response"])
     
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Main chat endpoint - sends message to LLM with MCP tools"""
+    trace = start_trace()
+    outcome = "exception"
     try:
-        result = await llm_service.chat(
-            message=request.message,
-            history=request.conversation_history,
-            tools=get_all_tools()
-        )
+        session = resolve_session(request)
+        async with session_turn(session):
+            history = session_history(request, session)
+            with span("select_tools") as attributes:
+                tools = select_tools(request.message, history)
+                attributes["tools"] = len(tools)
+            result = await llm_service.chat(
+                message=request.message,
+                history=history,
+                tools=tools
+            )
+            remember_turn(session, request.message, result)
+        outcome = "error" if result.get("error") else "cached" if result.get("cached") else "success"
+        if session is not None:
+            result["session_id"] = session.id
+        if request.trace:
+            result = {**result, "trace": trace.to_dict()}
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        CHAT_REQUESTS.inc(endpoint="chat", outcome=outcome)
+        CHAT_SECONDS.observe(time.perf_counter() - trace.started, endpoint="chat")
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming chat endpoint - newline-delimited JSON events, ending with a ChatResponse-shaped "done" event"""
+    session = resolve_session(request)
+
+    async def events():
+        # Started here, inside the generator, so spans from the stream land in this trace
+        trace = start_trace()
+        outcome = "disconnected"
+        try:
+            async with session_turn(session):
+                history = session_history(request, session)
+                with span("select_tools") as attributes:
+                    tools = select_tools(request.message, history)
+                    attributes["tools"] = len(tools)
+                async for event in llm_service.chat_stream(
+                    message=request.message,
+                    history=history,
+                    tools=tools
+                ):
+                    if event["type"] == "done":
+                        outcome = "error" if event.get("error") else "cached" if event.get("cached") else "success"
+                        remember_turn(session, request.message, event)
+                        event = {"type": "done", **ChatResponse(
+                            response=event["response"] or "",
+                            tool_calls=event["tool_calls"],
+                            cached=event.get("cached", False),
+                            session_id=session.id if session is not None else None,
+                            error=event.get("error"),
+                            trace=trace.to_dict() if request.trace else None
+                        ).model_dump()}
+                    yield json.dumps(event) + "\n"
+        finally:
+            CHAT_REQUESTS.inc(endpoint="chat_stream", outcome=outcome)
+            CHAT_SECONDS.observe(time.perf_counter() - trace.started, endpoint="chat_stream")
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a conversation's server-side history"""
+    return {"success": session_store.delete(session_id)}
 
 @app.get("/api/tools")
 async def list_tools():
     """List all available MCP tools"""
     return {"tools": get_all_tools()}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Counters and histograms in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health():
     return {
         "status": "healthy",
         "groq_key_set": bool(os.getenv("GROQ_API_KEY")),
-        "tools_count": len(get_all_tools())
+        "tools_count": len(get_all_tools()),
+        "query_cache": get_cache_stats(),
+        "sessions": session_store.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "index_jobs": get_index_queue().stats(),
+        "llm_providers": llm_service.router.stats()
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness of optional heavy components, separate from /health"""
+    needs_embeddings = RAG_ENABLED or answer_cache is not None
+    vs = get_vector_store()
+    if not needs_embeddings:
+        embedding_model = "disabled"
+    elif vs.load_error:
+        embedding_model = "failed"
+    else:
+        embedding_model = "warm" if vs.is_warm else "loading"
+    
+    body = {
+        "ready": embedding_model in ("warm", "disabled"),
+        "embedding_model": embedding_model,
+        "error": vs.load_error,
+        "timings": {**STARTUP_TIMINGS, **vs.timings}
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+class IndexRequest(BaseModel):
+    filename: str
+
+def require_rag():
+    if not RAG_ENABLED:
+        raise HTTPException(status_code=404, detail="Document indexing is disabled (ENABLE_RAG)")
+
+@app.post("/api/index")
+async def index_document(request: IndexRequest):
+    """Queue a document for background indexing"""
+    require_rag()
+    try:
+        job = get_index_queue().submit(request.filename, source="api")
+    except (ValueError, FileNotFoundError) as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "job": job.to_dict()}
+
+@app.post("/api/index/scan")
+async def index_directory():
+    """Queue every indexable document in the data directory"""
+    require_rag()
+    jobs = await asyncio.to_thread(get_index_queue().scan, INDEXABLE_EXTENSIONS)
+    return {"success": True, "jobs": [job.to_dict() for job in jobs]}
+
+@app.get("/api/index/jobs")
+async def list_index_jobs():
+    """Recent indexing jobs, newest first, with queue totals"""
+    index_queue = get_index_queue()
+    return {"jobs": [job.to_dict() for job in index_queue.list()], "stats": index_queue.stats()}
+
+@app.get("/api/index/jobs/{job_id}")
+async def get_index_job(job_id: str):
+    job = get_index_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """Upload a file to the documents directory"""
@@ -80,19 +341,57 @@ async def upload_file(file: UploadFile = File(...)):
                 "error": f"File type {file_ext} not allowed. Use: {', '.join(allowed_extensions)}"
             }
         
-        # Save file
+        # Save file (name only: a client-supplied path can't escape the data directory)
         data_dir = Path(os.getenv("DATA_DIR", "../data/documents"))
-        file_path = data_dir / file.filename
+        filename = Path(file.filename).name
+        file_path = data_dir / filename
         
-        content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        size = await save_upload(file, file_path)
+        if size is None:
+            return {
+                "success": False,
+                "error": f"File too large (max {UPLOAD_MAX_BYTES // (1024 * 1024)}MB)"
+            }
+        
+        # Index new documents in the background so the first question about them is fast
+        index_job = None
+        if RAG_ENABLED and file_ext in INDEXABLE_EXTENSIONS:
+            index_job = get_index_queue().submit(filename, source="upload").id
         
         return {
             "success": True,
-            "filename": file.filename,
-            "message": f"File {file.filename} uploaded successfully"
+            "filename": filename,
+            "size": size,
+            "index_job": index_job,
+            "message": f"File {filename} uploaded successfully"
         }
     
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+async def save_upload(upload: UploadFile, destination: Path) -> Optional[int]:
+    """Stream an upload into place; returns its size, or None if it exceeds UPLOAD_MAX_BYTES
+    
+    Chunks go to a temp file in the destination directory that is renamed over
+    the target only once complete, so readers never see a partial file. All
+    disk I/O runs on worker threads.
+    """
+    await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(
+        tempfile.mkstemp, dir=destination.parent, prefix=".upload-", suffix=".part"
+    )
+    size = 0
+    try:
+        # Buffered: BufferedWriter.write writes the whole chunk (raw FileIO may write part of it)
+        with open(fd, 'wb') as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    return None
+                await asyncio.to_thread(f.write, chunk)
+        await asyncio.to_thread(os.replace, temp_path, destination)
+        temp_path = None
+        return size
+    finally:
+        if temp_path is not None:
+            await asyncio.to_thread(os.remove, temp_path)
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+End-to-end /api/chat load test, fully offline: the real app under uvicorn, talking to the
+fake LLM server, which calls sqlite_query / files_list / files_read through a script.
+Reports throughput and latency percentiles per concurrency level for /api/chat and
+/api/chat/stream (plus time to first token).
+Run from backend/: python -m benchmarks.bench_chat_api --concurrency 1 8 32 --requests 200 --json results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.bench_sqlite_query import build_database
+from benchmarks.fake_llm_server import FakeLLMServer
+from benchmarks.results import add_json_argument, percentiles, write_results
+
+SCRIPT = [
+    {"match": r"revenue|sales", "tool_calls": [
+        {"name": "sqlite_query", "arguments": {"query": "SELECT category, SUM(total) AS revenue FROM orders GROUP BY category"}},
+    ]},
+    {"match": r"channel", "tool_calls": [
+        {"name": "sqlite_query", "arguments": {"query": "SELECT channel, COUNT(*) AS orders FROM orders GROUP BY channel"}},
+        {"name": "files_list", "arguments": {}},
+    ]},
+    {"match": r"read", "tool_calls": [
+        {"name": "files_read", "arguments": {"filename": "notes.txt", "length": 4096}},
+    ]},
+    {"match": r"files", "tool_calls": [{"name": "files_list", "arguments": {}}]},
+]
+
+# One tool-free turn, single- and multi-tool turns, in rotation
+MESSAGES = [
+    "What is our revenue by category?",
+    "How do orders split by channel, and which files do we have?",
+    "Read the notes file",
+    "List the files",
+    "Hello, what can you do?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int):
+    """Serve the app with uvicorn on a background thread; env must be configured first"""
+    import uvicorn
+    import app
+
+    server = uvicorn.Server(uvicorn.Config(app.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def load(base_url: str, endpoint: str, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, first_tokens, errors = [], [], 0
+
+    async def one(client: httpx.AsyncClient, i: int):
+        nonlocal errors
+        body = {"message": MESSAGES[i % len(MESSAGES)]}
+        async with semaphore:
+            started = time.perf_counter()
+            if endpoint == "chat":
+                response = await client.post("/api/chat", json=body)
+                failed = response.status_code != 200 or bool(response.json().get("error"))
+            else:
+                failed, first_token = True, None
+                async with client.stream("POST", "/api/chat/stream", json=body) as response:
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        if event["type"] == "token" and first_token is None:
+                            first_token = time.perf_counter() - started
+                            first_tokens.append(first_token)
+                        if event["type"] == "done":
+                            failed = bool(event.get("error"))
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[one(client, i) for i in range(requests)])
+        elapsed = time.perf_counter() - started
+
+    stats = {"requests_per_sec": requests / elapsed, "errors": errors, **percentiles(latencies)}
+    if first_tokens:
+        stats["first_token_p50_ms"] = percentiles(first_tokens)["p50_ms"]
+        stats["first_token_p95_ms"] = percentiles(first_tokens)["p95_ms"]
+    return stats
+
+
+def run(concurrency_levels: list, requests: int, latency: float, rows: int, json_path: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "documents")
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, "notes.txt"), "w") as f:
+            f.write("Quarterly notes: revenue grew in Electronics and Furniture.\n" * 2000)
+        db_path = os.path.join(tmp, "bench.db")
+        build_database(db_path, rows)
+
+        fake = FakeLLMServer(latency=latency, script=SCRIPT).start()
+        os.environ.update({
+            "GROQ_API_KEY": "fake-key",
+            "GROQ_BASE_URL": fake.base_url,
+            "DATA_DIR": data_dir,
+            "ALLOWED_DB_PATH": db_path,
+            "CSV_DB_PATH": os.path.join(tmp, "csv_tables.db"),
+            "ENABLE_RAG": "false",
+            "ANSWER_CACHE_ENABLED": "false",
+        })
+        port = free_port()
+        server, thread = start_app(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+        print(f"Fake LLM latency {latency:.3f}s, {rows} order rows, {requests} requests per level")
+        cases = []
+        try:
+            for endpoint in ("chat", "stream"):
+                for concurrency in concurrency_levels:
+                    before = fake.stats()
+                    stats = asyncio.run(load(base_url, endpoint, requests, concurrency))
+                    after = fake.stats()
+                    stats["llm_calls_per_request"] = (after["requests"] - before["requests"]) / requests
+                    stats["prompt_tokens_per_request"] = (after["prompt_tokens"] - before["prompt_tokens"]) / requests
+                    cases.append({"case": f"{endpoint} c={concurrency}", **stats})
+                    print(f"{endpoint:6} c={concurrency:<4} {stats['requests_per_sec']:8.1f} req/s  "
+                          f"p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  "
+                          f"errors {stats['errors']}")
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+            fake.stop()
+
+    write_results(json_path, "chat_api", {
+        "concurrency": concurrency_levels, "requests": requests, "latency": latency, "rows": rows
+    }, cases)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/api/chat throughput and latency under concurrency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per completion (seconds)")
+    parser.add_argument("--rows", type=int, default=50000, help="Order rows in the benchmark database")
+    add_json_argument(parser)
+    args = parser.parse_args()
+    run(args.concurrency, args.requests, args.latency, args.rows, args.json)
@@ -0,0 +1,98 @@
+"""
+files_read on a large generated file: random byte pages, a sequential scan by next_offset,
+and line ranges before (index build) and after the line index is cached.
+Run from backend/: python -m benchmarks.bench_files_read --size-mb 256 --reads 500 --json results.jsonl
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.results import add_json_argument, percentiles, write_results
+from mcp_tools import file_tools
+
+FILENAME = "large_export.csv"
+
+
+def build_file(path: str, size_mb: int) -> int:
+    """CSV-like rows of varying width, with some multi-byte characters; returns the line count"""
+    rng = random.Random(0)
+    cities = ["Berlin", "São Paulo", "Zürich", "Tokyo", "Montréal", "Austin"]
+    target = size_mb * 1024 * 1024
+    lines, written = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("id,city,amount,comment\n")
+        while written < target:
+            block = "".join(
+                f"{lines + i},{rng.choice(cities)},{rng.random() * 1000:.2f},{'x' * rng.randint(10, 120)}\n"
+                for i in range(10000)
+            )
+            f.write(block)
+            written += len(block.encode())
+            lines += 10000
+    return lines + 1
+
+
+async def timed(count: int, make_call) -> list:
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        result = await make_call(i)
+        samples.append(time.perf_counter() - started)
+        assert result["success"], result
+    return samples
+
+
+async def run(size_mb: int, reads: int, scan_mb: int, json_path: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_tools.DATA_DIR = tmp
+        path = os.path.join(tmp, FILENAME)
+        started = time.perf_counter()
+        lines = build_file(path, size_mb)
+        size = os.path.getsize(path)
+        print(f"{size / 2 ** 20:.0f} MB, {lines} lines (generated in {time.perf_counter() - started:.1f}s), "
+              f"page size {file_tools.READ_MAX_BYTES} bytes")
+        rng = random.Random(1)
+        cases = []
+
+        offsets = [rng.randrange(size) for _ in range(reads)]
+        samples = await timed(reads, lambda i: file_tools.files_read(FILENAME, offset=offsets[i]))
+        cases.append({"case": "random byte page", "reads_per_sec": reads / sum(samples), **percentiles(samples)})
+
+        # Sequential paging, the way the model walks a file with next_offset
+        scan_limit = min(size, scan_mb * 1024 * 1024)
+        offset, pages, started = 0, 0, time.perf_counter()
+        while offset is not None and offset < scan_limit:
+            result = await file_tools.files_read(FILENAME, offset=offset)
+            offset, pages = result["next_offset"], pages + 1
+        elapsed = time.perf_counter() - started
+        cases.append({"case": "sequential scan", "mb_per_s": min(size, scan_limit) / 2 ** 20 / elapsed,
+                      "pages": pages, "mean_ms": elapsed / pages * 1000})
+
+        # First line read builds the sparse line index; later ones reuse it
+        started = time.perf_counter()
+        result = await file_tools.files_read(FILENAME, start_line=lines // 2, end_line=lines // 2 + 50)
+        assert result["success"], result
+        cases.append({"case": "line range (index build)", "mean_ms": (time.perf_counter() - started) * 1000})
+
+        starts = [rng.randrange(1, lines) for _ in range(reads)]
+        samples = await timed(reads, lambda i: file_tools.files_read(FILENAME, start_line=starts[i], end_line=starts[i] + 50))
+        cases.append({"case": "line range (indexed)", "reads_per_sec": reads / sum(samples), **percentiles(samples)})
+
+    for case in cases:
+        summary = "  ".join(f"{key} {value:.2f}" for key, value in case.items() if key != "case")
+        print(f"{case['case']:26} {summary}")
+    write_results(json_path, "files_read", {"size_mb": size_mb, "reads": reads, "scan_mb": scan_mb}, cases)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="files_read latency on large files")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--reads", type=int, default=500, help="Random reads per case")
+    parser.add_argument("--scan-mb", type=int, default=64, help="How much of the file the sequential scan reads")
+    add_json_argument(parser)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mb, args.reads, args.scan_mb, args.json))
@@ -0,0 +1,53 @@
+"""
+Concurrent chat benchmark against a local fake LLM endpoint.
+Run from backend/: python -m benchmarks.bench_llm_concurrency --concurrency 20 [--json results.jsonl]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from benchmarks.results import add_json_argument, write_results
+from services.llm_service import LLMService
+
+
+async def run(concurrency: int, latency: float, json_path: str = None):
+    server = FakeLLMServer(latency=latency).start()
+    llm = LLMService(api_key="fake-key", model="fake-model", base_url=server.base_url)
+
+    try:
+        # Warm the connection pool so both runs measure steady state
+        await llm.chat("warm up", [], tools=[])
+
+        start = time.perf_counter()
+        await llm.chat("single", [], tools=[])
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            llm.chat(f"question {i}", [], tools=[]) for i in range(concurrency)
+        ])
+        concurrent = time.perf_counter() - start
+    finally:
+        await llm.aclose()
+        server.stop()
+
+    errors = [r for r in results if r["response"].startswith("Error:")]
+    print(f"Fake endpoint latency: {latency:.3f}s")
+    print(f"1 chat:              {single:.3f}s")
+    print(f"{concurrency} concurrent chats: {concurrent:.3f}s ({concurrent / single:.2f}x a single chat)")
+    print(f"Errors: {len(errors)}")
+    write_results(json_path, "llm_concurrency", {"concurrency": concurrency, "latency": latency}, [
+        {"case": "single", "total_s": single},
+        {"case": "concurrent", "total_s": concurrent, "slowdown": concurrent / single, "errors": len(errors)},
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLMService concurrency benchmark")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    add_json_argument(parser)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.latency, args.json))
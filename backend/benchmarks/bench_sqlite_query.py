@@ -0,0 +1,149 @@
+"""
+Concurrent sqlite_query throughput and latency on databases of increasing size: pooled
+read-only connections on worker threads vs. the old connect-per-call path on the event loop.
+Run from backend/: python -m benchmarks.bench_sqlite_query --rows 10000 100000 1000000 --concurrency 32 --json results.jsonl
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.results import add_json_argument, percentiles, write_results
+from mcp_tools import db_tools
+
+WORKLOADS = {
+    # Full-table aggregates: dominated by scan time
+    "aggregate": [
+        "SELECT category, SUM(total) as revenue FROM orders GROUP BY category",
+        "SELECT channel, COUNT(*) as order_count FROM orders GROUP BY channel",
+        "SELECT customer_id, AVG(total) as avg_order FROM orders GROUP BY customer_id",
+    ],
+    # Primary-key lookups: dominated by per-call connection and statement setup
+    "point": [f"SELECT * FROM orders WHERE id = {i}" for i in range(1, 1000, 7)],
+}
+
+
+def build_database(path: str, rows: int):
+    """Create an orders table with the sample schema and `rows` random rows"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_date DATE NOT NULL,
+            customer_id INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            total DECIMAL(10,2) NOT NULL,
+            channel TEXT NOT NULL
+        )
+    """)
+    products = [("Laptop", "Electronics", 999.99), ("Office Chair", "Furniture", 299.99),
+                ("Notebook Set", "Office Supplies", 15.99), ("Coffee Maker", "Appliances", 89.99)]
+    channels = ["Website", "Mobile App", "In-Store", "Phone"]
+    rng = random.Random(0)
+
+    def generate():
+        for _ in range(rows):
+            name, category, price = rng.choice(products)
+            quantity = rng.randint(1, 5)
+            yield ("2024-01-01", rng.randint(1, 500), name, category, quantity, price,
+                   round(price * quantity, 2), rng.choice(channels))
+
+    conn.executemany("""
+        INSERT INTO orders
+        (order_date, customer_id, product_name, category, quantity, price, total, channel)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, generate())
+    conn.commit()
+    conn.close()
+
+
+async def legacy_query(query: str):
+    """The previous implementation: new connection per call, run on the event loop"""
+    conn = sqlite3.connect(db_tools.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute(query).fetchall()]
+    conn.close()
+    return {"success": True, "rows": rows, "count": len(rows)}
+
+
+async def measure(query_func, queries, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    beats, latencies = [], []
+
+    async def heartbeat():
+        # Gaps between 10ms ticks show how long the event loop was blocked
+        while True:
+            beats.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await query_func(queries[i % len(queries)])
+            latencies.append(time.perf_counter() - started)
+            assert result["success"], result
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(total)])
+    elapsed = time.perf_counter() - start
+    beats.append(time.perf_counter())
+    beat.cancel()
+
+    gaps = [b - a for a, b in zip(beats, beats[1:])]
+    return {
+        "queries_per_sec": total / elapsed,
+        "elapsed_s": elapsed,
+        "max_loop_stall_ms": max(gaps, default=0.0) * 1000,
+        **percentiles(latencies),
+    }
+
+
+async def run(row_counts: list, total: int, concurrency: int, json_path: str):
+    cases = []
+    for rows in row_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            build_database(path, rows)
+            db_tools.DB_PATH = path
+            db_tools.csv_tables.DATA_DIR = os.path.join(tmp, "documents")
+            db_tools.csv_tables.CSV_DB_PATH = os.path.join(tmp, "csv_tables.db")
+
+            print(f"{rows} rows, {total} queries per workload, concurrency {concurrency}, "
+                  f"pool size {db_tools.POOL_SIZE}, {os.cpu_count()} CPUs")
+            cache_entries = db_tools._result_cache.max_entries
+            for workload, queries in WORKLOADS.items():
+                for label, func, cached in [("before (connect per call)", legacy_query, False),
+                                            ("after (pooled, threaded)", db_tools.sqlite_query, False),
+                                            ("after + result cache", db_tools.sqlite_query, True)]:
+                    # Only the last run may use the result cache
+                    db_tools._result_cache.clear()
+                    db_tools._result_cache.max_entries = cache_entries if cached else 0
+                    stats = await measure(func, queries, total, concurrency)
+                    cases.append({"case": f"{rows} rows {workload} {label}", **stats})
+                    print(f"{workload:9} {label:26} {stats['queries_per_sec']:8.1f} q/s  "
+                          f"p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  "
+                          f"max loop stall {stats['max_loop_stall_ms']:7.1f} ms")
+
+            print(f"result cache: {db_tools.get_cache_stats()}")
+            db_tools.get_pool().close()
+
+    write_results(json_path, "sqlite_query", {"rows": row_counts, "queries": total, "concurrency": concurrency}, cases)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="sqlite_query concurrency benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Database sizes to run")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    add_json_argument(parser)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.queries, args.concurrency, args.json))
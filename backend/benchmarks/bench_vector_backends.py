@@ -0,0 +1,139 @@
+"""
+Recall and latency of the NumPy mmap index (float16 / int8) vs. Chroma on the same corpus.
+Ground truth is exact float32 search. Uses synthetic clustered embeddings by default;
+pass --data-dir to embed real documents with the sentence-transformers model instead.
+Run from backend/: python -m benchmarks.bench_vector_backends --chunks 50000 --queries 200 [--json results.jsonl]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.results import add_json_argument, write_results
+from services.numpy_index import NumpyIndex
+
+WRITE_BATCH = 5000
+
+
+def synthetic_corpus(chunks: int, queries: int, dim: int, seed: int = 0):
+    """Unit vectors around a few hundred topic centroids, roughly like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(max(1, chunks // 200), dim))
+    assignment = rng.integers(0, len(centroids), chunks + queries)
+    vectors = centroids[assignment] + 0.6 * rng.normal(size=(chunks + queries, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors.astype(np.float32)
+    return vectors[:chunks], vectors[chunks:]
+
+
+def document_corpus(data_dir: str, queries: int, seed: int = 0):
+    """Embed every indexable document's chunks; queries are perturbed chunk embeddings"""
+    from services.vector_store import INDEXABLE_EXTENSIONS, VectorStore, chunk_text
+
+    texts = []
+    for name in sorted(os.listdir(data_dir)):
+        if os.path.splitext(name)[1].lower() in INDEXABLE_EXTENSIONS:
+            with open(os.path.join(data_dir, name), encoding="utf-8") as f:
+                texts.extend(chunk_text(f.read()))
+    vectors = VectorStore().model.encode(texts, batch_size=256).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), queries)]
+    return vectors, (picks + 0.05 * rng.normal(size=picks.shape)).astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (queries ** 2).sum(1)[:, None] + (corpus ** 2).sum(1)[None, :] - 2 * queries @ corpus.T
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def build(collection, corpus: np.ndarray) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(corpus), WRITE_BATCH):
+        batch = corpus[start:start + WRITE_BATCH]
+        ids = [str(i) for i in range(start, start + len(batch))]
+        collection.upsert(
+            ids=ids,
+            embeddings=batch.tolist(),
+            documents=[""] * len(ids),
+            metadatas=[{"filename": "bench", "chunk_index": int(i)} for i in ids]
+        )
+    return time.perf_counter() - started
+
+
+def measure(collection, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall": hits / truth.size,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def run(corpus: np.ndarray, queries: np.ndarray, k: int, skip_chroma: bool) -> list:
+    truth = exact_top_k(corpus, queries, k)
+    cases = []
+    print(f"{len(corpus)} chunks x {corpus.shape[1]} dims, {len(queries)} queries, recall@{k} vs exact float32")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = []
+        if not skip_chroma:
+            import chromadb
+            client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+            backends.append(("chroma (hnsw, float32)", client.get_or_create_collection("bench"), os.path.join(tmp, "chroma")))
+        for dtype in ("float16", "int8"):
+            path = os.path.join(tmp, f"numpy-{dtype}")
+            backends.append((f"numpy mmap ({dtype})", NumpyIndex(path, dtype=dtype), path))
+
+        for label, collection, path in backends:
+            build_s = build(collection, corpus)
+            # Open time and vector memory only apply to the mmapped index; Chroma has no figures for them
+            mmap_stats = {}
+            if isinstance(collection, NumpyIndex):
+                # Reopen so queries run against a cold, freshly mapped index like after a restart
+                started = time.perf_counter()
+                collection = NumpyIndex(path)
+                mmap_stats = {"open_ms": (time.perf_counter() - started) * 1000,
+                              "vector_bytes": collection.stats()["vector_bytes"]}
+            stats = measure(collection, queries, truth, k)
+            cases.append({"case": label, **stats, "build_s": build_s, **mmap_stats, "disk_bytes": directory_bytes(path)})
+            open_text = f"{mmap_stats['open_ms']:6.1f} ms" if mmap_stats else "   n/a   "
+            vectors_text = f"{mmap_stats['vector_bytes'] / 2 ** 20:7.1f} MB" if mmap_stats else "    n/a   "
+            print(f"{label:24} recall {stats['recall']:.3f}  p50 {stats['p50_ms']:7.2f} ms  "
+                  f"p95 {stats['p95_ms']:7.2f} ms  build {build_s:6.1f}s  open {open_text}  "
+                  f"vectors {vectors_text}  on disk {directory_bytes(path) / 2 ** 20:7.1f} MB")
+    return cases
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector backend recall/latency benchmark")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--data-dir", default=None, help="Embed real documents instead of synthetic vectors")
+    parser.add_argument("--skip-chroma", action="store_true", help="Only benchmark the NumPy index")
+    add_json_argument(parser)
+    args = parser.parse_args()
+
+    if args.data_dir:
+        corpus, queries = document_corpus(args.data_dir, args.queries)
+    else:
+        corpus, queries = synthetic_corpus(args.chunks, args.queries, args.dim)
+    cases = run(corpus, queries, args.top_k, args.skip_chroma)
+    write_results(args.json, "vector_backends", {
+        "chunks": len(corpus), "queries": len(queries), "dim": int(corpus.shape[1]), "top_k": args.top_k,
+        "data_dir": args.data_dir
+    }, cases)
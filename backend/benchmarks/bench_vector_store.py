@@ -0,0 +1,118 @@
+"""
+VectorStore indexing and search throughput on generated documents.
+By default embeddings come from a hashing encoder, so the run is offline and measures
+chunking, storage and search rather than the model; --embedder model uses the real
+sentence-transformers model (which must already be downloaded).
+Run from backend/: python -m benchmarks.bench_vector_store --docs 200 --backend numpy chroma --json results.jsonl
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from benchmarks.results import add_json_argument, percentiles, write_results
+from services.vector_store import VectorStore
+
+TOPICS = {
+    "sales": "revenue quarter growth region pipeline forecast bookings discount renewal churn",
+    "product": "feature release roadmap latency bug customer feedback onboarding dashboard export",
+    "finance": "budget expense invoice margin audit payroll cash forecast tax vendor",
+    "people": "hiring interview offer team manager review promotion training benefits policy",
+}
+FILLER = "the a of and to in for with on by this that from we our is are was were".split()
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words embeddings, a stand-in with the model's encode() signature"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def build_documents(directory: str, docs: int, doc_kb: int) -> list:
+    """Write topic-flavoured text files; returns the names with SKU-style identifiers to query"""
+    rng = random.Random(0)
+    topics = list(TOPICS)
+    for i in range(docs):
+        topic = topics[i % len(topics)]
+        words = TOPICS[topic].split()
+        parts, size = [], 0
+        while size < doc_kb * 1024:
+            sentence = " ".join(rng.choice(words) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(14))
+            sentence += f" SKU-{i:04d}-{len(parts)}. "
+            parts.append(sentence)
+            size += len(sentence)
+        with open(os.path.join(directory, f"{topic}_{i:04d}.txt"), "w") as f:
+            f.write("".join(parts))
+    return [f"{rng.choice(topics)} {' '.join(rng.sample(TOPICS[rng.choice(topics)].split(), 3))}" for _ in range(200)]
+
+
+def run(backends: list, docs: int, doc_kb: int, queries: int, embedder: str, json_path: str):
+    cases = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "documents")
+        os.makedirs(data_dir)
+        questions = build_documents(data_dir, docs, doc_kb)
+        print(f"{docs} documents x {doc_kb} KB, {queries} queries per mode, {embedder} embeddings")
+
+        for backend in backends:
+            vs = VectorStore(persist_directory=os.path.join(tmp, backend), backend=backend)
+            if embedder == "hashing":
+                vs._model = HashingEncoder()
+            try:
+                report = vs.index_directory(data_dir)
+            except ImportError as e:
+                print(f"{backend:7} skipped: {e}")
+                continue
+            cases.append({"case": f"{backend} index", "chunks_per_sec": report["chunks_per_sec"],
+                          "chunks": report["chunks_indexed"], **report["timings"]})
+
+            started = time.perf_counter()
+            unchanged = vs.index_directory(data_dir)
+            cases.append({"case": f"{backend} reindex unchanged", "total_s": time.perf_counter() - started,
+                          "files_unchanged": unchanged["files_unchanged"]})
+
+            for mode in ("lexical", "semantic", "hybrid"):
+                samples = []
+                for i in range(queries):
+                    query = questions[i % len(questions)]
+                    if mode == "lexical" and i % 2:
+                        query = f"SKU-{i % docs:04d}-1"  # Exact identifiers, the lexical sweet spot
+                    started = time.perf_counter()
+                    result = vs.search(query, top_k=5, mode=mode)
+                    samples.append(time.perf_counter() - started)
+                    assert result["success"], result
+                cases.append({"case": f"{backend} search {mode}", "queries_per_sec": queries / sum(samples),
+                              **percentiles(samples)})
+
+    for case in cases:
+        summary = "  ".join(f"{key} {value:.2f}" for key, value in case.items() if key != "case")
+        print(f"{case['case']:26} {summary}")
+    write_results(json_path, "vector_store", {
+        "backends": backends, "docs": docs, "doc_kb": doc_kb, "queries": queries, "embedder": embedder
+    }, cases)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VectorStore indexing and search throughput")
+    parser.add_argument("--backend", nargs="+", choices=["numpy", "chroma"], default=["numpy", "chroma"])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--doc-kb", type=int, default=20, help="Size of each generated document")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per search mode")
+    parser.add_argument("--embedder", choices=["hashing", "model"], default="hashing")
+    add_json_argument(parser)
+    args = parser.parse_args()
+    run(args.backend, args.docs, args.doc_kb, args.queries, args.embedder, args.json)
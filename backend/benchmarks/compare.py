@@ -0,0 +1,74 @@
+"""
+Compare two benchmark result files written with --json, e.g. from two commits.
+Run from backend/: python -m benchmarks.compare before.jsonl after.jsonl --threshold 10
+Uses the latest run of each benchmark/parameter combination in each file, prints the
+change in every metric and exits non-zero when any metric regressed past the threshold
+or any error count went up.
+"""
+
+import argparse
+import json
+import sys
+
+# Metrics where a bigger number is better; everything else (latencies, sizes) should shrink
+HIGHER_IS_BETTER = ("per_sec", "recall", "hit_rate", "mb_per_s")
+# Failure counts: any increase is a regression, whatever the threshold
+FAILURES = ("errors", "failures", "failed")
+# Counts that describe the workload rather than its performance; shown, never judged
+NEUTRAL = ("chunks", "pages", "files_unchanged", "rows", "count")
+
+
+def load(path: str) -> dict:
+    """(benchmark, params, case) -> metrics, keeping the last run of each"""
+    runs = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            params = json.dumps(record["params"], sort_keys=True)
+            for case in record["cases"]:
+                metrics = {key: value for key, value in case.items()
+                           if isinstance(value, (int, float)) and not isinstance(value, bool)}
+                runs[(record["benchmark"], params, str(case.get("case")))] = metrics
+    return runs
+
+
+def compare(before: dict, after: dict, threshold: float) -> int:
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        benchmark, _, case = key
+        print(f"{benchmark} / {case}")
+        for metric in sorted(before[key].keys() & after[key].keys()):
+            old, new = before[key][metric], after[key][metric]
+            flag = ""
+            if metric in FAILURES:
+                if new != old:
+                    flag = "  improved" if new < old else "  REGRESSED"
+                    regressions += 1 if new > old else 0
+                print(f"  {metric:28} {old:12.3f} -> {new:12.3f}  {new - old:+7g}{flag}")
+                continue
+            if old == 0:
+                continue
+            change = (new - old) / abs(old) * 100
+            better = change > 0 if any(word in metric for word in HIGHER_IS_BETTER) else change < 0
+            if abs(change) >= threshold and metric not in NEUTRAL:
+                flag = "  improved" if better else "  REGRESSED"
+                regressions += 0 if better else 1
+            print(f"  {metric:28} {old:12.3f} -> {new:12.3f}  {change:+7.1f}%{flag}")
+    missing = sorted(before.keys() - after.keys())
+    if missing:
+        print(f"{len(missing)} cases only in the baseline: {', '.join(f'{b}/{c}' for b, _, c in missing)}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change that counts as a regression")
+    args = parser.parse_args()
+
+    regressions = compare(load(args.before), load(args.after), args.threshold)
+    print(f"{regressions} regressions past {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
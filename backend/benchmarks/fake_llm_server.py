@@ -0,0 +1,229 @@
+"""
+Local stand-in for the Groq chat-completions API, used by the benchmarks.
+Run standalone with: python -m benchmarks.fake_llm_server --port 9000 --latency 0.5 [--script rules.json]
+then point the backend at it with GROQ_BASE_URL=http://127.0.0.1:9000
+
+A script makes the first completion of a turn call tools, like the real model would:
+[{"match": "revenue|sales", "tool_calls": [{"name": "sqlite_query", "arguments": {"query": "SELECT ..."}}]}]
+Rules are tried in order against the latest user message; a rule only fires when every
+tool it calls was offered in the request. After tool results come back the server
+answers with a short summary, so a scripted turn costs two completions.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when a load test opens many at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.5, script: list = None):
+        """Serve canned chat completions after a fixed latency, calling tools as the script says"""
+        self.latency = latency
+        self.script = [
+            {**rule, "pattern": re.compile(rule["match"], re.IGNORECASE)}
+            for rule in (script or [])
+        ]
+        self.request_count = 0
+        self.tool_call_count = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.request_count,
+                "tool_calls": self.tool_call_count,
+                "prompt_tokens": self.prompt_tokens,
+            }
+
+    def scripted_tool_calls(self, body: dict) -> list:
+        """Tool calls for a turn's first completion, or [] to answer directly"""
+        messages = body.get("messages", [])
+        if not messages or messages[-1].get("role") != "user" or not body.get("tools"):
+            return []
+        offered = {tool["function"]["name"] for tool in body["tools"]}
+        content = messages[-1].get("content") or ""
+        for rule in self.script:
+            calls = rule["tool_calls"]
+            if rule["pattern"].search(content) and all(call["name"] in offered for call in calls):
+                return [{
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}
+                } for call in calls]
+        return []
+
+    def completion(self, body: dict) -> dict:
+        """Build a chat.completion payload for a request body"""
+        messages = body.get("messages", [{}])
+        last = messages[-1]
+        tool_calls = self.scripted_tool_calls(body)
+        if tool_calls:
+            message = {"role": "assistant", "content": None, "tool_calls": tool_calls}
+        elif last.get("role") == "tool":
+            results = sum(1 for m in messages if m.get("role") == "tool")
+            message = {"role": "assistant", "content": f"Summary of {results} tool results: {(last.get('content') or '')[:200]}"}
+        else:
+            message = {"role": "assistant", "content": f"Echo: {last.get('content') or ''}"}
+
+        # Roughly 4 characters per token, counting the tool schemas like a real provider would
+        prompt_tokens = len(json.dumps(messages)) // 4 + len(json.dumps(body.get("tools") or [])) // 4
+        completion_tokens = len((message.get("content") or json.dumps(tool_calls)).split())
+        with self._lock:
+            self.tool_call_count += len(tool_calls)
+            self.prompt_tokens += prompt_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "logprobs": None,
+                "finish_reason": "tool_calls" if tool_calls else "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 so clients can reuse keep-alive connections
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without TCP_NODELAY each
+            # response can stall on a delayed ACK and inflate every latency
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                with fake._lock:
+                    fake.request_count += 1
+
+                if body.get("stream"):
+                    self._send_stream(fake.completion(body))
+                else:
+                    time.sleep(fake.latency)
+                    self._send(200, fake.completion(body))
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, completion: dict):
+                """Send the completion as SSE chunks, spreading the latency across tokens"""
+                message = completion["choices"][0]["message"]
+                tokens = [word + " " for word in (message.get("content") or "").split()]
+
+                # Tool calls stream as fragments: id and name first, then the arguments in two pieces
+                deltas = []
+                for index, tool_call in enumerate(message.get("tool_calls") or []):
+                    arguments = tool_call["function"]["arguments"]
+                    half = len(arguments) // 2
+                    deltas.append({"tool_calls": [{"index": index, "id": tool_call["id"], "type": "function",
+                                                   "function": {"name": tool_call["function"]["name"], "arguments": arguments[:half]}}]})
+                    deltas.append({"tool_calls": [{"index": index, "function": {"arguments": arguments[half:]}}]})
+                deltas.extend({"content": token} for token in tokens)
+                deltas = deltas or [{"content": ""}]
+                deltas[0]["role"] = "assistant"
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for i, delta in enumerate(deltas):
+                    time.sleep(fake.latency / len(deltas))
+                    last = i == len(deltas) - 1
+                    chunk = {
+                        "id": completion["id"],
+                        "object": "chat.completion.chunk",
+                        "created": completion["created"],
+                        "model": completion["model"],
+                        "choices": [{
+                            "index": 0,
+                            "delta": delta,
+                            "logprobs": None,
+                            "finish_reason": completion["choices"][0]["finish_reason"] if last else None
+                        }]
+                    }
+                    if last:
+                        # Groq reports usage on the final chunk
+                        chunk["x_groq"] = {"id": completion["id"], "usage": completion["usage"]}
+                    self._write_event(chunk)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_event(self, payload: dict):
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--script", default=None, help="JSON file of tool-calling rules")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    server = FakeLLMServer(args.host, args.port, args.latency, script)
+    print(f"Fake LLM server listening on {server.base_url} (latency {args.latency}s, {len(server.script)} script rules)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
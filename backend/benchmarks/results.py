@@ -0,0 +1,67 @@
+"""
+Machine-readable benchmark output. Each run appends one JSON object per line to the
+--json file: benchmark name, parameters, per-case metrics and the commit it ran on.
+Compare two files with: python -m benchmarks.compare before.jsonl after.jsonl
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+
+def percentiles(seconds: list) -> dict:
+    """Latency summary in milliseconds"""
+    if not seconds:
+        return {}
+    ordered = sorted(seconds)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def environment() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def add_json_argument(parser):
+    parser.add_argument("--json", metavar="PATH", default=None,
+                        help="Append machine-readable results to this JSONL file")
+
+
+def write_results(path: str, benchmark: str, params: dict, cases: list):
+    """Append one run; cases are dicts with a "case" name plus numeric metrics"""
+    if not path:
+        return
+    record = {
+        "benchmark": benchmark,
+        "params": params,
+        "cases": [{key: round(value, 4) if isinstance(value, float) else value for key, value in case.items()} for case in cases],
+        "env": environment(),
+    }
+    with open(path, "a") as f:
+        # Strict JSON: a NaN or infinity fails here rather than in whoever parses the file
+        f.write(json.dumps(record, allow_nan=False) + "\n")
+    print(f"Results appended to {path}")
@@ -0,0 +1,55 @@
+"""
+Run the whole offline benchmark suite, appending every result to one JSONL file.
+Run from backend/: python -m benchmarks.run_all --json bench_results/$(git rev-parse --short HEAD).jsonl [--quick]
+Then diff two commits with: python -m benchmarks.compare bench_results/<old>.jsonl bench_results/<new>.jsonl
+Each benchmark runs in its own process, since they point module settings at temporary data.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SUITES = {
+    "full": [
+        ("bench_chat_api", ["--concurrency", "1", "8", "32", "--requests", "100"]),
+        ("bench_sqlite_query", ["--rows", "10000", "100000", "1000000", "--queries", "200"]),
+        ("bench_vector_store", ["--docs", "200", "--queries", "200"]),
+        ("bench_vector_backends", ["--chunks", "50000", "--queries", "200"]),
+        ("bench_files_read", ["--size-mb", "256", "--reads", "500"]),
+        ("bench_llm_concurrency", ["--concurrency", "20"]),
+    ],
+    "quick": [
+        ("bench_chat_api", ["--concurrency", "1", "8", "--requests", "20", "--latency", "0.05", "--rows", "5000"]),
+        ("bench_sqlite_query", ["--rows", "5000", "50000", "--queries", "50"]),
+        ("bench_vector_store", ["--docs", "40", "--doc-kb", "10", "--queries", "50", "--backend", "numpy"]),
+        ("bench_vector_backends", ["--chunks", "5000", "--queries", "50", "--skip-chroma"]),
+        ("bench_files_read", ["--size-mb", "32", "--reads", "100", "--scan-mb", "16"]),
+        ("bench_llm_concurrency", ["--concurrency", "10", "--latency", "0.05"]),
+    ],
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every offline benchmark")
+    parser.add_argument("--json", required=True, metavar="PATH", help="JSONL file to append results to")
+    parser.add_argument("--quick", action="store_true", help="Small sizes, for a smoke test or CI")
+    parser.add_argument("--only", nargs="+", default=None, help="Benchmark modules to run, e.g. bench_files_read")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+    env = {**os.environ, "ANONYMIZED_TELEMETRY": "False"}
+    failed = []
+    for module, options in SUITES["quick" if args.quick else "full"]:
+        if args.only and module not in args.only:
+            continue
+        print(f"\n=== {module} {' '.join(options)}", flush=True)
+        started = time.perf_counter()
+        code = subprocess.call([sys.executable, "-m", f"benchmarks.{module}", *options, "--json", args.json], env=env)
+        print(f"=== {module} finished in {time.perf_counter() - started:.1f}s (exit {code})")
+        if code:
+            failed.append(module)
+
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+        sys.exit(1)
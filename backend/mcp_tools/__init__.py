@@ -1,33 +1,158 @@
-from .file_tools import files_list, files_read
-from .db_tools import sqlite_query
-# from .search_tools import doc_index, doc_search, doc_list  # Commented out for deployment
-
-# Tool registry (without RAG tools)
-TOOLS = {
-    "files_list": files_list,
-    "files_read": files_read,
-    "sqlite_query": sqlite_query,
+import importlib.util
+import os
+
+from .registry import ToolRegistry, ToolSpec
+
+def rag_enabled() -> bool:
+    """RAG tools are on when ENABLE_RAG says so, or by default when sentence-transformers is installed"""
+    setting = os.getenv("ENABLE_RAG", "auto").lower()
+    if setting in ("true", "1", "yes"):
+        return True
+    if setting in ("false", "0", "no"):
+        return False
+    return importlib.util.find_spec("sentence_transformers") is not None
+
+RAG_ENABLED = rag_enabled()
+
+# Built-in tools: implementation, group, and keywords that make the tool relevant
+# to a message (whole words, plurals included; "word*" matches any word starting
+# with "word"). Tools in a group are sent together, since the system prompt
+# chains them (doc_list -> doc_index -> doc_search, files_list -> files_read).
+BUILTIN_TOOLS = {
+    "files_list": ("mcp_tools.file_tools:files_list", "files", [
+        "file", "list", "folder", "director*", "upload*", "available", "csv",
+    ]),
+    "files_read": ("mcp_tools.file_tools:files_read", "files", [
+        "read", "open", "content", "raw", "line", "txt", "json", ".md",
+        # Questions about what a document says; without RAG, reading it is the only way
+        "document*", "report*", "summar*", "note", "guide*", "polic*", "manual", "say*", "said",
+        "claim*", "mention*", "according", "describe*", "explain*",
+    ]),
+    "sqlite_query": ("mcp_tools.db_tools:sqlite_query", None, [
+        "order*", "customer", "revenue", "sale", "sold", "total", "sum", "count", "how many",
+        "average", "avg", "sql", "query", "table", "database", "categor*", "product", "channel",
+        "price", "quantit*", "spend*", "spent", "month*", "year*", "quarter*", "q1", "q2", "q3", "q4",
+        "top", "trend*", "signup*", "csv",
+    ]),
+    "doc_index": ("mcp_tools.search_tools:doc_index", "documents", ["index*", "ingest*"]),
+    "doc_search": ("mcp_tools.search_tools:doc_search", "documents", [
+        "document*", "doc", "report*", "polic*", "guide*", "manual", "note", "summar*", "say*",
+        "said", "mention*", "according", "explain*", "describe*", "search*", "find", "strateg*", "meeting",
+    ]),
+    "doc_list": ("mcp_tools.search_tools:doc_list", "documents", ["indexed"]),
 }
 
+# Sent with every request: most chains start by finding a file's name
+ALWAYS_TOOLS = {"files_list"}
+
+RAG_TOOL_DEFINITIONS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "doc_index",
+            "description": "Index a document from the data directory so it can be searched semantically",
+            "parameters": {
+                "type": "object",
+                "properties": {"filename": {"type": "string", "description": "Name of the file to index"}},
+                "required": ["filename"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "doc_search",
+            "description": "Search indexed documents. Returns the most relevant text chunks for a question.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Question or topic to search for"},
+                    "top_k": {"type": "integer", "description": "Number of chunks to return (default 3)"},
+                    "mode": {
+                        "type": "string",
+                        "enum": ["hybrid", "lexical", "semantic"],
+                        "description": "'lexical' for exact terms (product names, IDs, quarter labels) - fastest; 'semantic' for meaning; 'hybrid' (default) combines both"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "doc_list",
+            "description": "List documents that have been indexed for semantic search, with chunk counts and sizes",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pattern": {"type": "string", "description": "Optional filename glob, e.g. '*.md'"},
+                    "limit": {"type": "integer", "description": "Maximum documents to return (default 100)"},
+                    "offset": {"type": "integer", "description": "Number of documents to skip, for paging"}
+                },
+                "required": []
+            }
+        }
+    },
+]
+
+def build_registry() -> ToolRegistry:
+    """Built-in tools, then TOOL_MODULES (comma-separated modules exposing TOOL_SPECS), then installed plugins
+
+    DISABLED_TOOLS (comma-separated names) removes tools from any source.
+    """
+    registry = ToolRegistry()
+    for definition in _base_tool_definitions() + (RAG_TOOL_DEFINITIONS if RAG_ENABLED else []):
+        target, group, keywords = BUILTIN_TOOLS[definition["function"]["name"]]
+        name = definition["function"]["name"]
+        registry.register(ToolSpec(definition, target, keywords, always=name in ALWAYS_TOOLS, group=group))
+    for module_name in filter(None, (name.strip() for name in os.getenv("TOOL_MODULES", "").split(","))):
+        registry.load_module(module_name)
+    registry.load_entry_points()
+    for name in filter(None, (name.strip() for name in os.getenv("DISABLED_TOOLS", "").split(","))):
+        registry.unregister(name)
+    return registry
+
 def get_all_tools():
     """Return MCP tool definitions for Groq"""
+    return registry.definitions()
+
+def select_tools(message: str, history=None):
+    """Return the tool definitions relevant to one chat message"""
+    return registry.select(message, history)
+
+def _base_tool_definitions():
     return [
         {
             "type": "function",
             "function": {
                 "name": "files_list",
-                "description": "List all available files in the data directory",
-                "parameters": {"type": "object", "properties": {}, "required": []}
+                "description": "List files in the data directory with size (bytes), modified time and type. Results are paged: if has_more is true, call again with next_offset.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "pattern": {"type": "string", "description": "Optional filename glob, e.g. '*.csv' or 'q1_*'"},
+                        "limit": {"type": "integer", "description": "Maximum files to return (default 100)"},
+                        "offset": {"type": "integer", "description": "Number of files to skip, for paging"}
+                    },
+                    "required": []
+                }
             }
         },
         {
             "type": "function",
             "function": {
                 "name": "files_read",
-                "description": "Read the contents of a specific file",
+                "description": "Read the contents of a specific file. Large files come back one page at a time: use next_offset or next_line from the result to continue.",
                 "parameters": {
                     "type": "object",
-                    "properties": {"filename": {"type": "string", "description": "Name of the file to read"}},
+                    "properties": {
+                        "filename": {"type": "string", "description": "Name of the file to read"},
+                        "offset": {"type": "integer", "description": "Byte offset to start reading from (default 0)"},
+                        "length": {"type": "integer", "description": "Maximum bytes to read"},
+                        "start_line": {"type": "integer", "description": "First line to read (1-based); use instead of offset for line ranges"},
+                        "end_line": {"type": "integer", "description": "Last line to read (inclusive)"}
+                    },
                     "required": ["filename"]
                 }
             }
@@ -36,13 +161,26 @@ def get_all_tools():
     "type": "function",
     "function": {
         "name": "sqlite_query",
-        "description": "Execute a READ-ONLY SQL query on the SQLite database. Available tables: 'orders' (id, order_date, customer_id, product_name, category, quantity, price, total, channel) and 'customers' (id, name, email, signup_date, total_orders). Only SELECT queries are allowed.",
+        "description": "Execute a READ-ONLY SQL query on the SQLite database. Available tables: 'orders' (id, order_date, customer_id, product_name, category, quantity, price, total, channel) and 'customers' (id, name, email, signup_date, total_orders). CSV files in the data directory are loaded as typed tables in the 'csv' schema, e.g. csv.sales_summary for sales_summary.csv (list them with SELECT name, sql FROM csv.sqlite_master WHERE type = 'table' AND name != '_csv_files'); aggregate CSVs with SQL instead of reading them. Only SELECT queries are allowed. Results are paged: if has_more is true, call again with next_cursor.",
         "parameters": {
             "type": "object",
             "properties": {
                 "query": {
                     "type": "string",
                     "description": "SQL SELECT query to execute. Example: SELECT category, SUM(total) as revenue FROM orders GROUP BY category"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum rows to return (default 200, max 1000). Prefer aggregates over large row dumps."
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor from a previous call with the same query, to fetch the next page"
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["rows", "columns"],
+                    "description": "'rows' returns a list of objects; 'columns' returns {columns: [...], rows: [[...]]}, which is more compact for wide or long results"
                 }
             },
             "required": ["query"]
@@ -51,10 +189,7 @@ def get_all_tools():
 }
     ]
 
+registry = build_registry()
+
 async def execute_tool(tool_name: str, arguments: dict):
-    if arguments is None:
-        arguments = {}
-    if tool_name not in TOOLS:
-        return {"error": f"Tool {tool_name} not found"}
-    tool_func = TOOLS[tool_name]
-    return await tool_func(**arguments)
+    return await registry.execute(tool_name, arguments)
@@ -0,0 +1,169 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List
+
+DATA_DIR = os.getenv("DATA_DIR", "../data/documents")
+
+# CSV files from DATA_DIR are bulk-loaded here and ATTACHed read-only to
+# sqlite_query connections as the "csv" schema (e.g. csv.sales_summary)
+CSV_DB_PATH = os.getenv("CSV_DB_PATH", "../data/csv_tables.db")
+CSV_SCHEMA = "csv"
+BOOKKEEPING_TABLE = "_csv_files"  # Hidden from sqlite_query
+TYPE_SAMPLE_ROWS = 1000
+
+_refresh_lock = threading.Lock()
+_refreshed_at = None  # time.monotonic() of the last refresh
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(CSV_DB_PATH)
+    # A rebuildable cache: trade durability for load speed
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS _csv_files (
+            filename TEXT PRIMARY KEY,
+            table_name TEXT UNIQUE NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            loaded_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+def refresh() -> Dict[str, Any]:
+    """Load new or modified CSV files and drop tables whose file is gone
+
+    Cheap when nothing changed: one directory scan compared against the
+    stored mtimes and sizes.
+    """
+    global _refreshed_at
+    with _refresh_lock:
+        _refreshed_at = time.monotonic()
+        current = {}
+        try:
+            with os.scandir(DATA_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith(".csv"):
+                        stat = entry.stat()
+                        current[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+
+        conn = _connect()
+        try:
+            loaded = {
+                filename: (mtime_ns, size, table)
+                for filename, mtime_ns, size, table in conn.execute(
+                    "SELECT filename, mtime_ns, size, table_name FROM _csv_files"
+                )
+            }
+            report = {"loaded": [], "dropped": [], "errors": {}}
+
+            for filename in loaded.keys() - current.keys():
+                with conn:
+                    conn.execute(f'DROP TABLE IF EXISTS "{loaded[filename][2]}"')
+                    conn.execute("DELETE FROM _csv_files WHERE filename = ?", (filename,))
+                report["dropped"].append(filename)
+
+            for filename, (mtime_ns, size) in sorted(current.items()):
+                previous = loaded.get(filename)
+                if previous and previous[:2] == (mtime_ns, size):
+                    continue
+                table = previous[2] if previous else _table_name(conn, filename)
+                try:
+                    rows = _load(conn, os.path.join(DATA_DIR, filename), table)
+                except Exception as e:
+                    report["errors"][filename] = str(e)
+                    continue
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO _csv_files VALUES (?, ?, ?, ?, ?, ?)",
+                        (filename, table, mtime_ns, size, rows, time.time())
+                    )
+                report["loaded"].append(filename)
+            return report
+        finally:
+            conn.close()
+
+def refreshed_within(seconds: float) -> bool:
+    """True if refresh() ran in the last `seconds` seconds"""
+    return _refreshed_at is not None and time.monotonic() - _refreshed_at < seconds
+
+def _load(conn: sqlite3.Connection, path: str, table: str) -> int:
+    """Stream one CSV into a fresh typed table, then swap it in atomically"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise ValueError("CSV file has no header row")
+        columns = _column_names(header)
+
+        # Column types come from a sample; SQLite's type affinity converts
+        # numeric-looking strings on insert and keeps odd values as text
+        sample = list(islice(reader, TYPE_SAMPLE_ROWS))
+        types = [_infer_type(row[i] if i < len(row) else "" for row in sample) for i in range(len(columns))]
+
+        staging = f"{table}__loading"
+        column_sql = ", ".join(f'"{name}" {kind}' for name, kind in zip(columns, types))
+        placeholders = ", ".join("?" * len(columns))
+
+        def rows() -> Iterable[List[Any]]:
+            width = len(columns)
+            for row in chain(sample, reader):
+                if not any(row):
+                    continue
+                row = (row + [""] * width)[:width]
+                yield [value if value != "" else None for value in row]
+
+        with conn:
+            conn.execute(f'DROP TABLE IF EXISTS "{staging}"')
+            conn.execute(f'CREATE TABLE "{staging}" ({column_sql})')
+            conn.executemany(f'INSERT INTO "{staging}" VALUES ({placeholders})', rows())
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.execute(f'ALTER TABLE "{staging}" RENAME TO "{table}"')
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+def _infer_type(values: Iterable[str]) -> str:
+    kind = "INTEGER"
+    seen = False
+    for value in values:
+        value = value.strip()
+        if not value:
+            continue
+        seen = True
+        if kind == "INTEGER" and not re.fullmatch(r"[-+]?\d+", value):
+            kind = "REAL"
+        if kind == "REAL":
+            try:
+                float(value)
+            except ValueError:
+                return "TEXT"
+    return kind if seen else "TEXT"
+
+def _column_names(header: List[str]) -> List[str]:
+    names = []
+    for i, raw in enumerate(header):
+        name = re.sub(r"\W+", "_", raw.strip().lower()).strip("_") or f"column_{i + 1}"
+        if name[0].isdigit():
+            name = f"c_{name}"
+        base, n = name, 2
+        while name in names:
+            name, n = f"{base}_{n}", n + 1
+        names.append(name)
+    return names
+
+def _table_name(conn: sqlite3.Connection, filename: str) -> str:
+    """SQL-friendly table name from a file name, unique among loaded tables"""
+    name = re.sub(r"\W+", "_", os.path.splitext(filename)[0].lower()).strip("_") or "table"
+    if name[0].isdigit():
+        name = f"t_{name}"
+    taken = {row[0] for row in conn.execute("SELECT table_name FROM _csv_files")}
+    base, n = name, 2
+    while name in taken:
+        name, n = f"{base}_{n}", n + 1
+    return name
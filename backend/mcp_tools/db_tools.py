@@ -1,11 +1,237 @@
 import sqlite3
+import asyncio
 import os
-from typing import Dict, Any
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+import base64
+import hashlib
+import json
+import re
+
+from services.cache import LRUCache
+from services.metrics import metrics, span
+from mcp_tools import csv_tables
 
 DB_PATH = os.getenv("ALLOWED_DB_PATH", "../data/sample.db")
+POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", str(min(8, os.cpu_count() or 1))))
+MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+DEFAULT_ROW_LIMIT = int(os.getenv("SQLITE_ROW_LIMIT", "200"))
+MAX_ROW_LIMIT = int(os.getenv("SQLITE_MAX_ROW_LIMIT", "1000"))
+FETCH_BATCH = 256
+RESULT_CACHE_ENTRIES = int(os.getenv("SQLITE_RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("SQLITE_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Cache hits skip the CSV directory scan if one ran this recently; misses always rescan
+CSV_REFRESH_SECONDS = float(os.getenv("CSV_REFRESH_SECONDS", "2"))
+
+QUERY_RESULTS = metrics.counter("copilot_sqlite_results_total", "sqlite_query pages by where they came from", ("source",))
+
+def _hide_csv_bookkeeping(action, arg1, arg2, db_name, source):
+    """SQLite authorizer: queries can't read csv_tables' internal file table"""
+    if action == sqlite3.SQLITE_READ and db_name == csv_tables.CSV_SCHEMA and arg1 == csv_tables.BOOKKEEPING_TABLE:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+class ConnectionPool:
+    """Bounded pool of long-lived, read-only SQLite connections"""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        # The CSV schema can only be attached if its database exists; get_pool()
+        # replaces the pool once it appears
+        self.with_csv = os.path.exists(csv_tables.CSV_DB_PATH)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Read-only URI mode: writes fail at the SQLite level, not just our keyword filter
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if self.with_csv:
+            # CSV files from the data directory, loaded by csv_tables.refresh()
+            csv_uri = f"{Path(csv_tables.CSV_DB_PATH).resolve().as_uri()}?mode=ro"
+            conn.execute(f"ATTACH DATABASE ? AS {csv_tables.CSV_SCHEMA}", (csv_uri,))
+            conn.set_authorizer(_hide_csv_bookkeeping)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, opening a new one only while under the size limit"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()  # Borrowed when the pool was replaced
+            else:
+                self._idle.put(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+# Initialize pool and query workers lazily (singleton pattern)
+_pool = None
+_pool_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="sqlite_query")
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH or (
+            not _pool.with_csv and os.path.exists(csv_tables.CSV_DB_PATH)
+        ):
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+# Query results keyed on normalized SQL, dropped whenever the database changes
+_result_cache = LRUCache(
+    max_entries=RESULT_CACHE_ENTRIES,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    sizeof=lambda result: len(json.dumps(result, default=str))
+)
+_cache_version = None
+
+def database_version(db_path: Optional[str] = None) -> tuple:
+    """Cheap change detector: mtime and size of the database and its WAL file"""
+    db_path = db_path or DB_PATH
+    version = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+def _check_cache_version():
+    """Invalidate every cached result if the database changed since they were stored"""
+    global _cache_version
+    version = (DB_PATH, database_version(DB_PATH), database_version(csv_tables.CSV_DB_PATH))
+    if version != _cache_version:
+        _result_cache.clear()
+        _cache_version = version
 
-async def sqlite_query(query: str) -> Dict[str, Any]:
-    """Execute a READ-ONLY SQLite query"""
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for sizing the query result cache"""
+    return _result_cache.stats()
+
+def _normalize_sql(query: str) -> str:
+    return " ".join(query.split()).rstrip(";").strip()
+
+def _query_digest(query: str) -> str:
+    """Fingerprint a query so a cursor can't be replayed against a different one"""
+    normalized = _normalize_sql(query).lower()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+def encode_cursor(query: str, offset: int) -> str:
+    """Continuation cursor for `query` starting at row `offset`"""
+    payload = json.dumps({"q": _query_digest(query), "o": offset}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def _decode_cursor(query: str, cursor: str) -> int:
+    """Return the row offset a continuation cursor points at"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset = int(payload["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if payload.get("q") != _query_digest(query) or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    return offset
+
+def _run_query(query: str, offset: int, limit: int, columnar: bool, state: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a query on a pooled connection (called on a worker thread)"""
+    with get_pool().connection() as conn:
+        state["conn"] = conn
+        try:
+            cursor = conn.execute(query)
+            columns = [d[0] for d in cursor.description or []]
+            
+            # Stream past earlier pages instead of materializing them
+            skipped = 0
+            while skipped < offset:
+                batch = cursor.fetchmany(min(FETCH_BATCH, offset - skipped))
+                if not batch:
+                    break
+                skipped += len(batch)
+            
+            # One extra row tells us whether another page exists
+            rows = cursor.fetchmany(limit + 1)
+            cursor.close()
+        finally:
+            state.pop("conn", None)
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    result = {"success": True}
+    if columnar:
+        # Compact layout: column names once, rows as arrays
+        result["columns"] = columns
+        result["rows"] = [list(row) for row in rows]
+    else:
+        # Convert to list of dicts
+        result["rows"] = [dict(zip(columns, row)) for row in rows]
+    
+    result.update({
+        "count": len(rows),
+        "has_more": has_more,
+        "offset": offset,
+        "next_cursor": encode_cursor(query, offset + len(rows)) if has_more else None
+    })
+    return result
+
+async def _refresh_csv_tables(loop):
+    """Lazily (re)load CSV tables whose files are new or changed"""
+    try:
+        with span("sqlite.csv_refresh"):
+            await loop.run_in_executor(_executor, csv_tables.refresh)
+    except Exception as e:
+        print(f"⚠️ CSV tables not refreshed: {e}")
+
+async def sqlite_query(
+    query: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "rows"
+) -> Dict[str, Any]:
+    """Execute a READ-ONLY SQLite query, returning at most `limit` rows per page"""
     try:
         # Security: only allow SELECT queries
         query_upper = query.strip().upper()
@@ -18,29 +244,55 @@ async def sqlite_query(query: str) -> Dict[str, Any]:
         # Additional security: prevent certain dangerous keywords
         dangerous_keywords = ["DROP", "DELETE", "INSERT", "UPDATE", "ALTER", "CREATE"]
         for keyword in dangerous_keywords:
-            if keyword in query_upper:
+            # Whole words only: CSV headers like created_at or is_deleted are fine
+            if re.search(rf"\b{keyword}\b", query_upper):
                 return {
                     "success": False,
                     "error": f"Keyword '{keyword}' is not allowed"
                 }
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        if format not in ("rows", "columns"):
+            return {"success": False, "error": "format must be 'rows' or 'columns'"}
         
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        limit = max(1, min(int(limit or DEFAULT_ROW_LIMIT), MAX_ROW_LIMIT))
+        offset = _decode_cursor(query, cursor) if cursor else 0
+        loop = asyncio.get_running_loop()
         
-        # Convert to list of dicts
-        results = [dict(row) for row in rows]
+        # Serve repeated questions from the cache while the database is unchanged;
+        # CSV files are rescanned first only if the last scan is CSV_REFRESH_SECONDS old
+        refreshed = not csv_tables.refreshed_within(CSV_REFRESH_SECONDS)
+        if refreshed:
+            await _refresh_csv_tables(loop)
+        _check_cache_version()
+        cache_key = (_normalize_sql(query), offset, limit, format)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            QUERY_RESULTS.inc(source="cache")
+            return {**cached, "cached": True}
         
-        conn.close()
+        # About to hit the database: pick up CSV files added since the last scan
+        if not refreshed:
+            await _refresh_csv_tables(loop)
+            _check_cache_version()
         
-        return {
-            "success": True,
-            "rows": results,
-            "count": len(results)
-        }
+        # Run off the event loop so slow SQL doesn't freeze other requests
+        state = {}
+        try:
+            with span("sqlite.execute") as attributes:
+                result = await loop.run_in_executor(
+                    _executor, _run_query, query, offset, limit, format == "columns", state
+                )
+                attributes["rows"] = result.get("count")
+        except asyncio.CancelledError:
+            # Tool timed out: abort the statement instead of letting it hold a worker
+            conn = state.get("conn")
+            if conn is not None:
+                conn.interrupt()
+            raise
+        
+        _result_cache.set(cache_key, result)
+        QUERY_RESULTS.inc(source="database")
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -1,28 +1,133 @@
 import os
+import asyncio
+import fnmatch
+import mmap
+import threading
+from array import array
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+from services.cache import LRUCache
 
 DATA_DIR = os.getenv("DATA_DIR", "../data/documents")
 
-async def files_list() -> Dict[str, Any]:
-    """List all files in the data directory"""
+# Most bytes files_read returns per call; bigger files are paged with offset/length or line ranges
+READ_MAX_BYTES = int(os.getenv("FILES_READ_MAX_BYTES", "65536"))
+
+# Line index: byte offset of every LINE_INDEX_STRIDE-th line, so a line range
+# is one lookup plus a scan of under LINE_INDEX_STRIDE lines
+LINE_INDEX_STRIDE = 1024
+_line_indexes = LRUCache(
+    max_entries=int(os.getenv("LINE_INDEX_CACHE_ENTRIES", "32")),
+    sizeof=lambda entry: len(entry[1]) * 8
+)
+
+# Directory listing, rebuilt only when the directory's mtime changes (files added, removed or renamed)
+_listing = {"key": None, "files": [], "filtered": {}}
+_listing_lock = threading.Lock()
+
+def documents_version() -> tuple:
+    """Cheap change detector for the data directory: file count, total size, newest mtime"""
+    count, total_size, newest = 0, 0, 0
     try:
-        data_path = Path(DATA_DIR)
-        
-        # Create directory if it doesn't exist
-        data_path.mkdir(parents=True, exist_ok=True)
+        with os.scandir(DATA_DIR) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    count += 1
+                    total_size += stat.st_size
+                    newest = max(newest, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return (count, total_size, newest)
+
+async def files_list(pattern: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+    """List files in the data directory with size, modification time and type, optionally glob-filtered and paged"""
+    try:
+        files = _cached_listing()
+        if files is None:
+            files = await asyncio.to_thread(_build_listing)
         
-        files = [f.name for f in data_path.iterdir() if f.is_file()]
+        if pattern:
+            files = _filtered(files, pattern)
+        limit = max(1, min(int(limit), 1000))
+        offset = max(0, int(offset))
+        page = files[offset:offset + limit]
+        has_more = offset + len(page) < len(files)
         return {
             "success": True,
-            "files": files,
-            "count": len(files)
+            "files": page,
+            "count": len(page),
+            "total": len(files),
+            "has_more": has_more,
+            "next_offset": offset + len(page) if has_more else None
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-async def files_read(filename: str) -> Dict[str, Any]:
-    """Read contents of a file"""
+def _listing_key() -> Optional[Tuple[str, int]]:
+    try:
+        return (DATA_DIR, os.stat(DATA_DIR).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+def _cached_listing() -> Optional[list]:
+    """The cached listing if the directory hasn't changed since it was built (one stat call)"""
+    key = _listing_key()
+    with _listing_lock:
+        if key is not None and _listing["key"] == key:
+            return _listing["files"]
+    return None
+
+def _filtered(files: list, pattern: str) -> list:
+    """Glob matches, memoized per pattern for as long as this listing is current"""
+    with _listing_lock:
+        memo = _listing["filtered"] if _listing["files"] is files else None
+        matches = memo.get(pattern) if memo is not None else None
+    if matches is None:
+        matches = [f for f in files if fnmatch.fnmatch(f["name"], pattern)]
+        with _listing_lock:
+            if memo is not None and len(memo) < 64:
+                memo[pattern] = matches
+    return matches
+
+def _build_listing() -> list:
+    """Scan the data directory once; scandir reuses directory-entry data instead of a stat per name"""
+    # Create directory if it doesn't exist
+    Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+    
+    # Read the key first: a change during the scan leaves the cache stale-keyed and forces a rescan
+    key = _listing_key()
+    files = []
+    with os.scandir(DATA_DIR) as entries:
+        for entry in entries:
+            # Dotfiles include in-progress uploads
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            files.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+                "type": Path(entry.name).suffix.lower().lstrip(".") or "file"
+            })
+    files.sort(key=lambda f: f["name"])
+    
+    with _listing_lock:
+        _listing.update(key=key, files=files, filtered={})
+    return files
+
+async def files_read(
+    filename: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None
+) -> Dict[str, Any]:
+    """Read a file, a byte range (offset/length) or a line range (start_line/end_line, 1-based, inclusive)
+    
+    At most READ_MAX_BYTES come back per call; next_offset / next_line say where to continue.
+    """
     try:
         file_path = Path(DATA_DIR) / filename
         
@@ -34,19 +139,105 @@ async def files_read(filename: str) -> Dict[str, Any]:
         if not file_path.exists():
             return {"success": False, "error": f"File not found: {filename}"}
         
-        # Read file (limit size for safety)
-        MAX_SIZE = 1024 * 1024  # 1MB
-        if file_path.stat().st_size > MAX_SIZE:
-            return {"success": False, "error": "File too large (max 1MB)"}
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return {
-            "success": True,
-            "filename": filename,
-            "content": content,
-            "size": len(content)
-        }
+        result = await asyncio.to_thread(_read_range, file_path.resolve(), offset, length, start_line, end_line)
+        return {"success": True, "filename": filename, **result}
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+def _read_range(path: Path, offset: Optional[int], length: Optional[int],
+                start_line: Optional[int], end_line: Optional[int]) -> Dict[str, Any]:
+    stat = path.stat()
+    if stat.st_size == 0:
+        # mmap can't map an empty file
+        return {"content": "", "size": 0, "total_bytes": 0, "has_more": False}
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start_line is not None or end_line is not None:
+            result = _read_lines(mm, _line_index(mm, str(path), stat), start_line or 1, end_line)
+        else:
+            result = _read_bytes(mm, offset or 0, length)
+    result["total_bytes"] = stat.st_size
+    return result
+
+def _read_bytes(mm: mmap.mmap, offset: int, length: Optional[int]) -> Dict[str, Any]:
+    total = len(mm)
+    length = min(length or READ_MAX_BYTES, READ_MAX_BYTES)
+    start = _char_boundary(mm, min(max(offset, 0), total))
+    end = _char_boundary(mm, min(start + max(length, 1), total))
+    if end <= start < total:
+        # Range narrower than one character: return the whole character
+        end = start + 1
+        while end < total and mm[end] & 0xC0 == 0x80:
+            end += 1
+    
+    content = mm[start:end].decode('utf-8', errors='replace')
+    return {
+        "content": content,
+        "size": len(content),
+        "offset": start,
+        "has_more": end < total,
+        "next_offset": end if end < total else None
+    }
+
+def _read_lines(mm: mmap.mmap, index: Tuple[array, int], start_line: int, end_line: Optional[int]) -> Dict[str, Any]:
+    checkpoints, total_lines = index
+    first = max(start_line, 1) - 1  # 0-based from here on
+    last = total_lines if end_line is None else min(end_line, total_lines)
+    if first >= last:
+        return {"content": "", "size": 0, "start_line": start_line, "total_lines": total_lines,
+                "has_more": False, "next_line": None}
+    
+    # Jump to the nearest indexed line, then scan forward to the first requested one
+    pos = checkpoints[first // LINE_INDEX_STRIDE]
+    for _ in range(first % LINE_INDEX_STRIDE):
+        pos = mm.find(b"\n", pos) + 1
+    
+    start, line = pos, first
+    while line < last:
+        newline = mm.find(b"\n", pos)
+        line_end = len(mm) if newline < 0 else newline + 1
+        if line_end - start > READ_MAX_BYTES and line > first:
+            break
+        pos, line = line_end, line + 1
+    
+    result = {"start_line": first + 1, "end_line": line, "total_lines": total_lines, "offset": start}
+    if pos - start > READ_MAX_BYTES:
+        # A single line longer than the cap: return its head and continue by byte offset
+        pos = _char_boundary(mm, start + READ_MAX_BYTES)
+        result["truncated_line"] = True
+        result["next_offset"] = pos
+    
+    content = mm[start:pos].decode('utf-8', errors='replace')
+    result.update({
+        "content": content,
+        "size": len(content),
+        "has_more": line < last or "truncated_line" in result,
+        "next_line": line + 1 if line < total_lines else None
+    })
+    return result
+
+def _line_index(mm: mmap.mmap, key: str, stat: os.stat_result) -> Tuple[array, int]:
+    """Sparse line-offset index for a file, cached until its mtime or size changes"""
+    entry = _line_indexes.get(key)
+    if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+        return entry[1], entry[2]
+    
+    checkpoints, lines, pos = array('q', [0]), 0, 0
+    while True:
+        newline = mm.find(b"\n", pos)
+        if newline < 0:
+            break
+        lines, pos = lines + 1, newline + 1
+        if lines % LINE_INDEX_STRIDE == 0:
+            checkpoints.append(pos)
+    if pos < len(mm):
+        lines += 1  # Last line has no trailing newline
+    
+    _line_indexes.set(key, ((stat.st_mtime_ns, stat.st_size), checkpoints, lines))
+    return checkpoints, lines
+
+def _char_boundary(mm: mmap.mmap, pos: int) -> int:
+    """Move pos back to the start of a UTF-8 character"""
+    while 0 < pos < len(mm) and mm[pos] & 0xC0 == 0x80:
+        pos -= 1
+    return pos
@@ -0,0 +1,132 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import os
+import re
+
+from services.metrics import metrics, span
+
+# Installed packages can contribute tools: an entry point in this group
+# resolves to a list of ToolSpec (or a function returning one)
+ENTRY_POINT_GROUP = "llm_data_copilot.tools"
+
+TOOL_CALLS = metrics.counter("copilot_tool_calls_total", "Tool executions by outcome", ("tool", "outcome"))
+
+class ToolSpec:
+    def __init__(self, definition: Dict[str, Any], target: str, keywords: Iterable[str] = (),
+                 always: bool = False, group: Optional[str] = None):
+        """A tool's schema plus where its implementation lives, as "module:function"
+
+        The module is only imported on the tool's first call. keywords are
+        words (or "prefix*") that make the tool relevant to a message; tools
+        sharing a group are selected together; always=True tools are sent
+        with every request.
+        """
+        self.definition = definition
+        self.name = definition["function"]["name"]
+        self.target = target
+        self.keywords = [keyword.lower() for keyword in keywords]
+        self.always = always
+        self.group = group
+        self._pattern = re.compile("|".join(map(_keyword_pattern, self.keywords))) if self.keywords else None
+        self._func: Optional[Callable] = None
+
+    @property
+    def func(self) -> Callable:
+        if self._func is None:
+            module, _, attr = self.target.partition(":")
+            self._func = getattr(import_module(module), attr)
+        return self._func
+
+    def matches(self, text: str) -> bool:
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+def _keyword_pattern(keyword: str) -> str:
+    """"sum" matches sum/sums but not summary; "summar*" matches summary/summarize"""
+    if keyword.endswith("*"):
+        return r"\b" + re.escape(keyword[:-1])
+    return r"\b" + re.escape(keyword) + r"(?:s|es)?\b"
+
+class ToolRegistry:
+    def __init__(self, selection: Optional[bool] = None):
+        """Tool definitions and implementations, built once at startup"""
+        self._specs: Dict[str, ToolSpec] = {}
+        self._definitions: Optional[List[Dict[str, Any]]] = None
+        if selection is None:
+            selection = os.getenv("TOOL_SELECTION", "true").lower() in ("true", "1", "yes")
+        self.selection = selection
+
+    def register(self, spec: ToolSpec):
+        self._specs[spec.name] = spec
+        self._definitions = None
+
+    def unregister(self, name: str):
+        if self._specs.pop(name, None) is not None:
+            self._definitions = None
+
+    def load_module(self, module_name: str):
+        """Register a module's TOOL_SPECS; its tool functions still load lazily"""
+        for spec in import_module(module_name).TOOL_SPECS:
+            self.register(spec)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP):
+        for entry_point in entry_points(group=group):
+            try:
+                specs = entry_point.load()
+                for spec in specs() if callable(specs) else specs:
+                    self.register(spec)
+            except Exception as e:
+                print(f"⚠️ Skipping tool plugin {entry_point.name}: {e}")
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Every tool definition; the list is built once and shared, so don't mutate it"""
+        if self._definitions is None:
+            self._definitions = [spec.definition for spec in self._specs.values()]
+        return self._definitions
+
+    def select(self, message: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
+        """Definitions of the tools relevant to a message
+
+        The previous user turn is matched too, so short follow-ups ("and by
+        channel?") keep their tools. When nothing matches, every tool is sent:
+        a missing tool costs a wrong answer, an extra one only prompt tokens.
+        """
+        if not self.selection:
+            return self.definitions()
+        text = message
+        for turn in reversed(history or []):
+            if turn.get("role") == "user":
+                text = f"{turn.get('content') or ''}\n{text}"
+                break
+        text = text.lower()
+
+        matched = [spec for spec in self._specs.values() if spec.matches(text)]
+        if not matched:
+            return self.definitions()
+        groups = {spec.group for spec in matched if spec.group}
+        return [
+            spec.definition for spec in self._specs.values()
+            if spec.always or spec in matched or spec.group in groups
+        ]
+
+    async def execute(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        spec = self._specs.get(name)
+        if spec is None:
+            TOOL_CALLS.inc(tool="unknown", outcome="not_found")
+            return {"error": f"Tool {name} not found"}
+        outcome = "error"
+        try:
+            with span(f"tool.{name}") as attributes:
+                result = await spec.func(**(arguments or {}))
+                failed = isinstance(result, dict) and (result.get("success") is False or "error" in result)
+                outcome = attributes["outcome"] = "failed" if failed else "success"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"  # Timed out in LLMService
+            raise
+        finally:
+            TOOL_CALLS.inc(tool=name, outcome=outcome)
@@ -1,6 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from services.vector_store import VectorStore
-from pathlib import Path
+from services.index_jobs import IndexJobQueue
+import asyncio
 import os
 
 # Initialize vector store (singleton pattern)
@@ -14,46 +15,60 @@ def get_vector_store():
 
 DATA_DIR = os.getenv("DATA_DIR", "../data/documents")
 
+# How long doc_index waits for its background job before answering with progress instead
+DOC_INDEX_WAIT_SECONDS = float(os.getenv("DOC_INDEX_WAIT_SECONDS", "5"))
+
+index_queue = None
+
+def get_index_queue():
+    global index_queue
+    if index_queue is None:
+        index_queue = IndexJobQueue(get_vector_store(), DATA_DIR)
+    return index_queue
+
 async def doc_index(filename: str) -> Dict[str, Any]:
-    """Index a document for semantic search"""
+    """Index a document for semantic search
+    
+    Indexing runs as a background job; small documents finish within the
+    short wait, larger ones report progress and keep indexing.
+    """
     try:
-        file_path = Path(DATA_DIR) / filename
-        
-        # Security check
-        if not file_path.resolve().is_relative_to(Path(DATA_DIR).resolve()):
-            return {"success": False, "error": "Access denied"}
+        job = get_index_queue().submit(filename, source="tool")
         
-        if not file_path.exists():
-            return {"success": False, "error": f"File not found: {filename}"}
+        # Wait without blocking the event loop, but never for the whole job on a big file
+        await asyncio.to_thread(job.finished.wait, DOC_INDEX_WAIT_SECONDS)
+        if job.finished.is_set():
+            return job.result
         
-        # Read file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Index it
-        vs = get_vector_store()
-        result = vs.index_document(filename, content)
-        
-        return result
+        status = job.to_dict()
+        done = f" ({status['chunks_done']}/{status['chunks_total']} chunks)" if status["chunks_total"] else ""
+        return {
+            "success": True,
+            "filename": filename,
+            "job_id": job.id,
+            "status": job.status,
+            "message": f"{filename} is being indexed in the background{done}; doc_search covers the finished part"
+        }
     
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-async def doc_search(query: str, top_k: int = 3) -> Dict[str, Any]:
+async def doc_search(query: str, top_k: int = 3, mode: Optional[str] = None) -> Dict[str, Any]:
     """Search indexed documents for relevant content"""
     try:
         vs = get_vector_store()
-        result = vs.search(query, top_k=top_k)
+        result = await asyncio.to_thread(vs.search, query, top_k=top_k, mode=mode)
         return result
     
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-async def doc_list() -> Dict[str, Any]:
-    """List all indexed documents"""
+async def doc_list(pattern: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+    """List indexed documents from the catalog, optionally filtered and paged"""
     try:
         vs = get_vector_store()
-        result = vs.list_indexed_documents()
+        limit = max(1, min(int(limit), 1000))
+        result = await asyncio.to_thread(vs.list_indexed_documents, pattern, limit, max(0, int(offset)))
         return result
     
     except Exception as e:
@@ -0,0 +1,142 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+# Which data source each tool's answer depends on; unknown tools depend on everything
+TOOL_SOURCES = {
+    "sqlite_query": ["database", "documents"],  # CSV tables are loaded from the documents directory
+    "files_list": ["documents"],
+    "files_read": ["documents"],
+    "doc_index": ["documents"],
+    "doc_search": ["documents"],
+    "doc_list": ["documents"],
+}
+
+def source_versions() -> Dict[str, Any]:
+    """Current version fingerprint of every data source an answer can depend on"""
+    from mcp_tools.db_tools import database_version
+    from mcp_tools.file_tools import documents_version
+    return {"database": database_version(), "documents": documents_version()}
+
+class AnswerCache:
+    def __init__(
+        self,
+        model_loader: Callable[[], Any],
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        versions: Callable[[], Dict[str, Any]] = source_versions,
+        version_interval: Optional[float] = None
+    ):
+        """Semantic cache of chat answers keyed on the question's embedding
+
+        lookup() and store() do blocking work (source version checks scan the
+        data directory), so async callers should run them on a worker thread.
+        """
+        self._model_loader = model_loader
+        self.threshold = threshold or float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+        self.ttl = ttl_seconds or float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+        self._versions = versions
+        # Source versions are rechecked at most this often, not on every lookup
+        self.version_interval = version_interval if version_interval is not None else float(
+            os.getenv("ANSWER_CACHE_VERSION_INTERVAL", "1")
+        )
+        self._version_cache: Optional[Dict[str, Any]] = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._matrix = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def embed(self, message: str) -> np.ndarray:
+        """Embed a question on a worker thread (the model is CPU-bound)"""
+        def encode():
+            model = self._model_loader()
+            return model.encode([message], normalize_embeddings=True)[0].astype(np.float32)
+        return await asyncio.to_thread(encode)
+
+    def lookup(self, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Return the cached result for the most similar live question above the threshold"""
+        versions = self._current_versions() if any(entry["versions"] for entry in self._entries) else {}
+        with self._lock:
+            self._expire(versions)
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            # Embeddings are normalized, so the dot product is cosine similarity
+            scores = self._matrix @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry = self._entries[best]
+            return {**entry["result"], "cached": True, "similarity": round(float(scores[best]), 4)}
+
+    def store(self, embedding: np.ndarray, message: str, result: Dict[str, Any]):
+        """Cache a successful answer along with the versions of the sources it used"""
+        sources = set()
+        for tool_call in result.get("tool_calls", []):
+            sources.update(TOOL_SOURCES.get(tool_call["name"], ["database", "documents"]))
+        versions = self._current_versions()
+
+        with self._lock:
+            self._entries.append({
+                "message": message,
+                "result": dict(result),
+                "versions": {source: versions.get(source) for source in sources},
+                "expires_at": time.monotonic() + self.ttl
+            })
+            row = embedding[np.newaxis, :]
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+
+            # Drop the oldest answers once full
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
+                self._matrix = self._matrix[-self.max_entries:]
+
+    def _current_versions(self) -> Dict[str, Any]:
+        """Source versions, recomputed at most every version_interval seconds and outside the entry lock"""
+        with self._version_lock:
+            now = time.monotonic()
+            if self._version_cache is None or now - self._version_checked >= self.version_interval:
+                self._version_cache = self._versions()
+                self._version_checked = now
+            return self._version_cache
+
+    def _expire(self, versions: Dict[str, Any]):
+        """Remove entries past their TTL or whose data sources have changed since"""
+        now = time.monotonic()
+        keep = [
+            i for i, entry in enumerate(self._entries)
+            if entry["expires_at"] > now and all(
+                versions.get(source) == version for source, version in entry["versions"].items()
+            )
+        ]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._matrix = self._matrix[keep] if keep else None
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
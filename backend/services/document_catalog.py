@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+import os
+import sqlite3
+import threading
+import time
+
+class DocumentCatalog:
+    def __init__(self, path: str):
+        """Sidecar SQLite table of indexed documents, maintained by the indexing path"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    filename TEXT PRIMARY KEY,
+                    chunk_count INTEGER NOT NULL,
+                    content_hash TEXT,
+                    byte_size INTEGER,
+                    indexed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def upsert(self, filename: str, chunk_count: int, content_hash: Optional[str], byte_size: Optional[int]):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO documents (filename, chunk_count, content_hash, byte_size, indexed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(filename) DO UPDATE SET
+                    chunk_count = excluded.chunk_count,
+                    content_hash = excluded.content_hash,
+                    byte_size = excluded.byte_size,
+                    indexed_at = excluded.indexed_at
+            """, (filename, chunk_count, content_hash, byte_size, time.time()))
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE filename = ?", (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self, filename: str, content_hash: str) -> bool:
+        """True if the document is indexed with exactly this content"""
+        entry = self.get(filename)
+        return entry is not None and entry["content_hash"] == content_hash
+
+    def list(self, pattern: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """Page through documents, optionally filtered by a glob pattern on the filename"""
+        where, params = ("WHERE filename GLOB ?", [pattern]) if pattern else ("", [])
+        with self._lock:
+            totals = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(chunk_count), 0) FROM documents {where}", params
+            ).fetchone()
+            rows = self._conn.execute(
+                f"SELECT * FROM documents {where} ORDER BY filename LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return {
+            "documents": [dict(row) for row in rows],
+            "total_documents": totals[0],
+            "total_chunks": totals[1],
+            "has_more": offset + len(rows) < totals[0]
+        }
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value)
+            )
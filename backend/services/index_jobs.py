@@ -0,0 +1,171 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import os
+import queue
+import threading
+import time
+import uuid
+
+class IndexJob:
+    def __init__(self, filename: str, source: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.source = source  # "api", "upload", "scan" or "tool"
+        self.status = "queued"  # -> "running" -> "done" | "failed"
+        self.chunks_done = 0
+        self.chunks_total = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        progress = None
+        if self.chunks_total:
+            progress = round(self.chunks_done / self.chunks_total, 3)
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "source": self.source,
+            "status": self.status,
+            "progress": progress,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class IndexJobQueue:
+    def __init__(self, vector_store, data_dir: str, workers: Optional[int] = None, history: Optional[int] = None):
+        """Background document indexing on a small pool of worker threads
+
+        Embedding is CPU-bound, so it runs here rather than inside a chat
+        request. A file that already has a queued job isn't queued twice, and
+        jobs for the same file never run at the same time (they share chunk
+        ids and a catalog row); a later one waits for the running one.
+        """
+        self.vector_store = vector_store
+        self.data_dir = data_dir
+        self.workers = workers or int(os.getenv("INDEX_WORKERS", "1"))
+        self.history = history or int(os.getenv("INDEX_JOB_HISTORY", "200"))
+        self._queue: "queue.Queue[Optional[IndexJob]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, IndexJob]" = OrderedDict()
+        self._queued: Dict[str, IndexJob] = {}  # filename -> job not yet started
+        self._file_locks: Dict[str, list] = {}  # filename -> [lock, jobs using it]
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def _start_workers(self):
+        # Called with the lock held: threads start on first submit
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"index-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, filename: str, source: str = "api") -> IndexJob:
+        """Queue a file for indexing, or return the job already queued for it"""
+        path = Path(self.data_dir) / filename
+        if not path.resolve().is_relative_to(Path(self.data_dir).resolve()):
+            raise ValueError("Access denied")
+        if not path.is_file():
+            raise FileNotFoundError(f"File not found: {filename}")
+
+        with self._lock:
+            job = self._queued.get(filename)
+            if job is not None:
+                return job
+            job = IndexJob(filename, source)
+            self._queued[filename] = job
+            self._jobs[job.id] = job
+            self._trim()
+            self._start_workers()
+        self._queue.put(job)
+        return job
+
+    def scan(self, extensions, source: str = "scan") -> List[IndexJob]:
+        """Queue every indexable file in the data directory; unchanged ones finish as no-ops"""
+        names = sorted(
+            entry.name for entry in os.scandir(self.data_dir)
+            if entry.is_file() and Path(entry.name).suffix.lower() in extensions
+        )
+        return [self.submit(name, source) for name in names]
+
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IndexJob]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.workers, "queued": len(self._queued), "jobs": counts}
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished.is_set()]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    @contextmanager
+    def _file_lock(self, filename: str):
+        """Serialize jobs for one file across workers"""
+        with self._lock:
+            entry = self._file_locks.setdefault(filename, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._file_locks[filename]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._file_lock(job.filename):
+                with self._lock:
+                    # From here on a new submit for this file queues a fresh job
+                    self._queued.pop(job.filename, None)
+                    job.status = "running"
+                    job.started_at = time.time()
+                self._run(job)
+
+    def _run(self, job: IndexJob):
+        def progress(done: int, total: int):
+            job.chunks_done, job.chunks_total = done, total
+
+        try:
+            path = Path(self.data_dir) / job.filename
+            result = self.vector_store.index_file(str(path), job.filename, progress=progress)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        with self._lock:
+            job.result = result
+            job.status = "done" if result.get("success") else "failed"
+            job.error = None if result.get("success") else result.get("error")
+            job.finished_at = time.time()
+        job.finished.set()
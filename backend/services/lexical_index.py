@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Set
+import os
+import re
+import sqlite3
+import threading
+
+class LexicalIndex:
+    def __init__(self, path: str):
+        """BM25 keyword index over document chunks (SQLite FTS5), kept next to the vector store"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                    text, chunk_id UNINDEXED, filename UNINDEXED, chunk_index UNINDEXED
+                )
+            """)
+            # FTS5 can't index chunk_id, so replacements find their row through this table
+            self._conn.execute("CREATE TABLE IF NOT EXISTS chunk_rows (chunk_id TEXT PRIMARY KEY, fts_rowid INTEGER)")
+
+    def add(self, items: List[Dict[str, Any]]):
+        """Index (or re-index) chunks shaped like VectorStore's plan items"""
+        with self._lock, self._conn:
+            self._delete([item["id"] for item in items])
+            for item in items:
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (text, chunk_id, filename, chunk_index) VALUES (?, ?, ?, ?)",
+                    (item["document"], item["id"], item["metadata"]["filename"], item["metadata"]["chunk_index"])
+                )
+                self._conn.execute("INSERT INTO chunk_rows (chunk_id, fts_rowid) VALUES (?, ?)", (item["id"], cursor.lastrowid))
+
+    def remove(self, ids: List[str]):
+        with self._lock, self._conn:
+            self._delete(ids)
+
+    def _delete(self, ids: List[str]):
+        for chunk_id in ids:
+            row = self._conn.execute("SELECT fts_rowid FROM chunk_rows WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM chunks WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM chunk_rows WHERE chunk_id = ?", (chunk_id,))
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT chunk_id FROM chunk_rows")}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_rows").fetchone()[0]
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Best BM25 matches for any of the query's words; higher score is better"""
+        match = self._match_expression(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT chunk_id, text, filename, chunk_index, bm25(chunks) AS rank
+                FROM chunks WHERE chunks MATCH ? ORDER BY rank LIMIT ?
+            """, (match, top_k)).fetchall()
+        return [
+            {"id": chunk_id, "text": text, "filename": filename, "chunk_index": chunk_index, "score": -rank}
+            for chunk_id, text, filename, chunk_index, rank in rows
+        ]
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        """OR of quoted words, so identifiers like SKU-1042 or Q3-2024 match as exact phrases"""
+        words = [word.strip(".,;:!?()[]{}'\"") for word in query.split()]
+        terms = [word for word in words if re.search(r"\w", word)]
+        return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
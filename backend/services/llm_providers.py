@@ -0,0 +1,395 @@
+from collections import deque
+from groq import APIConnectionError, AsyncGroq
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import httpx
+import json
+import os
+import random
+import time
+
+from services.metrics import metrics
+
+# Worth another try (maybe elsewhere): timeouts, rate limits, overload and server errors
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+# Wrong key, no access, unknown model or path: that provider is broken, the next may not be
+PROVIDER_STATUSES = {401, 403, 404}
+
+ATTEMPTS = metrics.counter("copilot_llm_attempts_total", "LLM provider calls by outcome", ("provider", "outcome"))
+HEDGES = metrics.counter("copilot_llm_hedges_total", "Backup requests sent because a provider was slow", ("provider",))
+FAILOVERS = metrics.counter("copilot_llm_failovers_total", "Requests moved to the next provider after a failure", ("provider",))
+
+class ProviderUnavailable(Exception):
+    """Every provider's circuit breaker is open"""
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, APIConnectionError, ProviderUnavailable)):
+        return True
+    return _status(error) in RETRY_STATUSES
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Errors that count against the provider and move the request on to the next one"""
+    return is_retryable(error) or _status(error) in PROVIDER_STATUSES
+
+class _Payload:
+    """Attribute access over decoded JSON, like the SDK's response models; missing fields read as None"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _wrap(self._data.get(name))
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return _Payload(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+class _EventStream:
+    """Server-sent chat.completion.chunk events from an OpenAI-compatible endpoint"""
+
+    def __init__(self, response: httpx.Response):
+        self.response = response
+
+    async def __aiter__(self):
+        try:
+            async for line in self.response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                yield _wrap(json.loads(data))
+        finally:
+            await self.response.aclose()
+
+    async def close(self):
+        await self.response.aclose()
+
+class OpenAICompatibleClient:
+    def __init__(self, base_url: str, api_key: Optional[str], http_client: httpx.AsyncClient):
+        """Minimal chat-completions client for any OpenAI-compatible endpoint (vLLM, Ollama, OpenAI, ...)
+
+        Mirrors the part of the Groq SDK that LLMService uses:
+        client.chat.completions.create(...).
+        """
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http_client = http_client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, stream: bool = False, **body):
+        body = {key: value for key, value in body.items() if value is not None}
+        if not stream:
+            response = await self.http_client.post(self.url, json=body, headers=self.headers)
+            response.raise_for_status()
+            return _wrap(response.json())
+
+        request = self.http_client.build_request("POST", self.url, json={**body, "stream": True}, headers=self.headers)
+        response = await self.http_client.send(request, stream=True)
+        if response.status_code >= 400:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return _EventStream(response)
+
+    async def close(self):
+        pass  # The shared HTTP client is closed by its owner
+
+class CircuitBreaker:
+    def __init__(self, failures: int, reset_after: float):
+        """Stop calling a provider after `failures` consecutive errors; let one trial through after reset_after seconds"""
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        """Whether a call could go out now; doesn't claim the half-open probe"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial)
+
+    def claim(self) -> bool:
+        """Take permission for one call; in half_open only one probe is out at a time"""
+        if not self.allow():
+            return False
+        if self.state == "half_open":
+            self._trial = True
+        return True
+
+    def release(self):
+        """The claimed call has finished, whatever the outcome (success, failure, cancelled)"""
+        self._trial = False
+
+    def record_success(self):
+        self.consecutive, self.opened_at = 0, None
+
+    def record_failure(self):
+        self.consecutive += 1
+        if self._trial or self.consecutive >= self.failures:
+            self.opened_at = time.monotonic()
+
+class Provider:
+    def __init__(self, name: str, client, model: str, window: int = 200):
+        """One OpenAI-compatible endpoint with its model, breaker and recent latencies"""
+        self.name = name
+        self.client = client
+        self.model = model
+        self.breaker = CircuitBreaker(
+            failures=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_after=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+        # Seconds to a full completion / to the first streamed chunk
+        self.latencies = {"complete": deque(maxlen=window), "stream": deque(maxlen=window)}
+
+    def quantile(self, kind: str, q: float, min_samples: int = 20) -> Optional[float]:
+        samples = sorted(self.latencies[kind])
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.quantile("complete", 0.95)
+        return {
+            "name": self.name,
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+def providers_from_env(api_key: Optional[str], model: str, base_url: Optional[str],
+                       http_client: httpx.AsyncClient) -> List[Provider]:
+    """Providers in priority order: LLM_PROVIDERS (a JSON list), or just Groq
+
+    LLM_PROVIDERS='[{"name": "groq"}, {"name": "local", "kind": "openai",
+    "base_url": "http://localhost:8001/v1", "model": "llama3.1", "api_key_env": "LOCAL_LLM_KEY"}]'
+    "kind" is "groq" (the Groq SDK) or "openai" (any OpenAI-compatible endpoint);
+    model and base_url default to LLMService's.
+    """
+    spec = json.loads(os.getenv("LLM_PROVIDERS") or "[]") or [{"name": "groq", "kind": "groq"}]
+    providers = []
+    for entry in spec:
+        kind = entry.get("kind", "groq" if entry.get("name") == "groq" else "openai")
+        key = os.getenv(entry["api_key_env"]) if entry.get("api_key_env") else api_key if kind == "groq" else None
+        url = entry.get("base_url", base_url if kind == "groq" else None)
+        if kind == "groq":
+            # Retries happen in ProviderRouter, across providers, not inside the SDK
+            client = AsyncGroq(api_key=key, base_url=url, http_client=http_client, max_retries=0)
+        elif kind == "openai":
+            if not url:
+                raise ValueError(f"LLM provider {entry.get('name')} needs a base_url")
+            client = OpenAICompatibleClient(url, key, http_client)
+        else:
+            raise ValueError(f"Unknown LLM provider kind: {kind}")
+        providers.append(Provider(entry.get("name", kind), client, entry.get("model", model)))
+    return providers
+
+class ProviderRouter:
+    def __init__(self, providers: List[Provider], attempt_timeout: Optional[float] = None,
+                 deadline: Optional[float] = None, limiter: Optional[asyncio.Semaphore] = None):
+        """Sends each completion to the first healthy provider, with hedging, failover and retries
+
+        A call that is slower than the provider's p95 gets a duplicate on the next
+        provider and the first response wins; a call that fails (timeouts, server
+        errors, or that provider's auth / not-found errors) moves straight on to
+        the next provider. When every provider has failed transiently, the whole
+        round is retried with exponential backoff, within an overall deadline.
+        Errors in the request itself (e.g. 400) are raised once no other attempt
+        is still running.
+
+        The caller holds one limiter slot for the request; every attempt that
+        runs alongside another one (a hedge) needs a free slot of its own, so
+        hedging stops when the limiter is saturated.
+        """
+        self.providers = providers
+        self.limiter = limiter
+        self.attempt_timeout = attempt_timeout or float(os.getenv("LLM_ATTEMPT_TIMEOUT", os.getenv("LLM_TIMEOUT", "60")))
+        self.deadline = deadline or float(os.getenv("LLM_REQUEST_DEADLINE", "90"))
+        self.hedging = os.getenv("LLM_HEDGE", "true").lower() in ("true", "1", "yes")
+        self.hedge_quantile = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+        self.hedge_default = float(os.getenv("LLM_HEDGE_DELAY", "2"))  # Until there are enough samples
+        self.hedge_min = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.25"))
+        self.hedge_max = float(os.getenv("LLM_HEDGE_MAX_DELAY", "10"))
+        self.retries = int(os.getenv("LLM_RETRIES", "2"))
+        self.backoff = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+        self.backoff_max = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+        metrics.gauge(
+            "copilot_llm_circuit_open", "1 while a provider's circuit breaker is open",
+            lambda: {(p.name,): int(p.breaker.state == "open") for p in self.providers}, ("provider",)
+        )
+
+    async def complete(self, **kwargs) -> Tuple[Provider, Any]:
+        return await asyncio.wait_for(self._with_retries("complete", kwargs), self.deadline)
+
+    async def stream(self, **kwargs) -> Tuple[Provider, AsyncIterator[Any]]:
+        """Open a stream; hedging and failover race to the first chunk, after which the winner is committed"""
+        provider, (stream, iterator, first) = await asyncio.wait_for(self._with_retries("stream", kwargs), self.deadline)
+
+        async def chunks():
+            try:
+                if first is not None:
+                    yield first
+                async for chunk in iterator:
+                    yield chunk
+            finally:
+                await _close(stream)
+
+        return provider, chunks()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [provider.stats() for provider in self.providers]
+
+    async def aclose(self):
+        for provider in self.providers:
+            await provider.client.close()
+
+    async def _with_retries(self, kind: str, kwargs: Dict[str, Any]):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Full jitter, so clients that failed together don't retry together
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1))))
+            order = [provider for provider in self.providers if provider.breaker.allow()]  # Claimed on launch
+            if not order:
+                error = ProviderUnavailable("All LLM providers are failing; try again shortly")
+                continue
+            try:
+                return await self._race(kind, order, kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+        raise error
+
+    def _hedge_delay(self, provider: Provider, kind: str) -> float:
+        delay = provider.quantile(kind, self.hedge_quantile)
+        return min(self.hedge_max, max(self.hedge_min, delay if delay is not None else self.hedge_default))
+
+    async def _race(self, kind: str, order: List[Provider], kwargs: Dict[str, Any]):
+        """First success among the providers in order, starting the next one on a hedge timeout or a failure"""
+        remaining = list(order)
+        tasks: Dict[asyncio.Task, Provider] = {}
+        error: Optional[BaseException] = None  # Last provider failure
+        fatal: Optional[BaseException] = None  # A request error, raised if nothing else succeeds
+        winner = None
+
+        async def launch(extra: bool) -> Optional[Provider]:
+            """Start the next provider whose breaker lets a call through; extra attempts need a limiter slot"""
+            if extra and self.limiter is not None:
+                if self.limiter.locked():
+                    return None
+                await self.limiter.acquire()  # Free, so this doesn't wait
+            while remaining:
+                provider = remaining.pop(0)
+                if provider.breaker.claim():
+                    task = asyncio.ensure_future(self._attempt(kind, provider, kwargs))
+                    if extra and self.limiter is not None:
+                        task.add_done_callback(lambda _: self.limiter.release())
+                    tasks[task] = provider
+                    return provider
+            if extra and self.limiter is not None:
+                self.limiter.release()
+            return None
+
+        try:
+            if await launch(extra=False) is None:
+                raise ProviderUnavailable("All LLM providers are failing; try again shortly")
+            while True:
+                pending = [task for task in tasks if not task.done()]
+                if not pending:
+                    provider = await launch(extra=False) if fatal is None else None
+                    if provider is None:
+                        raise fatal or error or ProviderUnavailable("All LLM providers are failing; try again shortly")
+                    FAILOVERS.inc(provider=provider.name)
+                    continue
+                newest = tasks[pending[-1]]
+                hedge = self.hedging and remaining and fatal is None
+                timeout = self._hedge_delay(newest, kind) if hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    provider = await launch(extra=True)
+                    if provider is not None:
+                        HEDGES.inc(provider=provider.name)
+                    continue  # Without a free slot, give the running attempts another hedge delay
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return tasks[task], task.result()
+                    if is_provider_failure(task.exception()):
+                        # Keep a transient error if there is one, so the round is retried
+                        if error is None or is_retryable(task.exception()) or not is_retryable(error):
+                            error = task.exception()
+                    else:
+                        fatal = task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # A losing stream that opened at the same moment as the winner
+            for task in tasks:
+                if kind == "stream" and task is not winner and not task.cancelled() and task.exception() is None:
+                    await _close(task.result()[0])
+
+    async def _attempt(self, kind: str, provider: Provider, kwargs: Dict[str, Any]):
+        started = time.perf_counter()
+        stream = None
+        try:
+            if kind == "complete":
+                result = await asyncio.wait_for(
+                    provider.client.chat.completions.create(model=provider.model, **kwargs), self.attempt_timeout
+                )
+            else:
+                async def open_stream():
+                    nonlocal stream
+                    stream = await provider.client.chat.completions.create(model=provider.model, stream=True, **kwargs)
+                    iterator = stream.__aiter__()
+                    try:
+                        first = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        first = None
+                    return stream, iterator, first
+                result = await asyncio.wait_for(open_stream(), self.attempt_timeout)
+        except asyncio.CancelledError:
+            ATTEMPTS.inc(provider=provider.name, outcome="cancelled")
+            if stream is not None:
+                await _close(stream)
+            raise
+        except Exception as e:
+            if stream is not None:
+                await _close(stream)
+            if is_provider_failure(e):
+                provider.breaker.record_failure()
+            ATTEMPTS.inc(provider=provider.name, outcome="error")
+            raise
+        finally:
+            provider.breaker.release()
+        provider.breaker.record_success()
+        provider.latencies[kind].append(time.perf_counter() - started)
+        ATTEMPTS.inc(provider=provider.name, outcome="success")
+        return result
+
+async def _close(stream):
+    close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+    if close is not None:
+        try:
+            await close()
+        except Exception:
+            pass
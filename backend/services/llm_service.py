@@ -1,12 +1,64 @@
-from groq import Groq
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+import asyncio
+import httpx
 import json
 import os
+import time
+
+from services.llm_providers import ProviderRouter, providers_from_env
+from services.metrics import record_error, record_usage, span
+from services.result_compactor import ResultCompactor
 
 class LLMService:
-    def __init__(self, api_key: str, model: str = "llama-3.1-70b-versatile"):
-        self.client = Groq(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "llama-3.1-70b-versatile",
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        tool_timeout: Optional[float] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        compactor: Optional[ResultCompactor] = None,
+        answer_cache: Optional[Any] = None
+    ):
+        # Limits are configurable through the environment so deployments can tune them
+        max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+        timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+
+        # One pooled, keep-alive HTTP client shared by every request
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+            ),
+            timeout=httpx.Timeout(timeout, connect=10.0)
+        )
         self.model = model
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Groq by default (base_url falls back to GROQ_BASE_URL, e.g. a local stand-in);
+        # LLM_PROVIDERS adds OpenAI-compatible backups for hedging and failover.
+        # Hedges take their own concurrency slots.
+        self.router = ProviderRouter(
+            providers_from_env(api_key, model, base_url, self.http_client), limiter=self._semaphore
+        )
+
+        # Per-tool timeouts, e.g. TOOL_TIMEOUTS="sqlite_query=10,doc_index=120"
+        self.tool_timeout = tool_timeout or float(os.getenv("TOOL_TIMEOUT", "30"))
+        self.tool_timeouts = dict(tool_timeouts or self._parse_overrides(os.getenv("TOOL_TIMEOUTS", "")))
+
+        # Token budgets for tool results, e.g. TOOL_TOKEN_BUDGETS="files_read=6000"
+        self.compactor = compactor or ResultCompactor(tool_budgets={
+            name: int(budget)
+            for name, budget in self._parse_overrides(os.getenv("TOOL_TOKEN_BUDGETS", "")).items()
+        })
+
+        # Optional semantic cache (services.answer_cache.AnswerCache)
+        self.answer_cache = answer_cache
     
     async def chat(
         self, 
@@ -17,13 +69,17 @@ class LLMService:
         """
         Send chat message to Groq with tool calling support
         """
+        embedding, cached = await self._cached_answer(message, history)
+        if cached is not None:
+            return cached
+
         messages = self._build_messages(message, history)
         tool_calls_log = []
         
         try:
             # Initial LLM call
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "first_completion",
                 messages=messages,
                 tools=tools if tools else None,
                 tool_choice="auto" if tools else None,
@@ -34,42 +90,26 @@ class LLMService:
             
             # Handle tool calls if any
             if hasattr(assistant_message, 'tool_calls') and assistant_message.tool_calls:
-                for tool_call in assistant_message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    
-                    # Execute the tool
-                    tool_result = await self._execute_tool(tool_name, tool_args)
-                    
-                    # Log for transparency
-                    tool_calls_log.append({
-                        "name": tool_name,
-                        "arguments": tool_args,
-                        "result": tool_result
-                    })
-                    
-                    # Add tool result to conversation
-                    messages.append({
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [{
-                            "id": tool_call.id,
-                            "type": "function",
-                            "function": {
-                                "name": tool_call.function.name,
-                                "arguments": tool_call.function.arguments
-                            }
-                        }]
-                    })
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result)
-                    })
+                tool_calls = [{
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments
+                    }
+                } for tool_call in assistant_message.tool_calls]
+
+                # Independent tool calls from one turn run concurrently
+                results = await asyncio.gather(*[
+                    self._run_tool_call(tool_call) for tool_call in tool_calls
+                ])
+                tool_calls_log = self._append_tool_results(
+                    messages, assistant_message.content, tool_calls, results
+                )
                 
                 # Get final response after tool execution
-                final_response = self.client.chat.completions.create(
-                    model=self.model,
+                final_response = await self._complete(
+                    "second_completion",
                     messages=messages,
                     max_tokens=2000
                 )
@@ -77,17 +117,269 @@ class LLMService:
             else:
                 final_text = assistant_message.content
             
-            return {
+            result = {
                 "response": final_text,
                 "tool_calls": tool_calls_log
             }
+            await self._remember_answer(embedding, message, result)
+            return result
         
         except Exception as e:
+            record_error("chat", e)
+            print(f"❌ Chat failed: {type(e).__name__}: {e}")
             return {
                 "response": f"Error: {str(e)}",
-                "tool_calls": []
+                "tool_calls": [],
+                "error": f"{type(e).__name__}: {e}"
             }
     
+    async def _cached_answer(self, message: str, history: List[Dict[str, str]]):
+        """Look up a near-duplicate answer; returns (embedding, cached result or None)"""
+        # Follow-up questions depend on their conversation, so only first turns are cached
+        if self.answer_cache is None or history:
+            return None, None
+        with span("answer_cache.lookup") as attributes:
+            try:
+                embedding = await self.answer_cache.embed(message)
+            except Exception as e:
+                print(f"Answer cache unavailable: {e}")
+                return None, None
+            cached = await asyncio.to_thread(self.answer_cache.lookup, embedding)
+            attributes["hit"] = cached is not None
+        return embedding, cached
+
+    async def _remember_answer(self, embedding, message: str, result: Dict[str, Any]):
+        """Cache an answer unless one of its tools failed"""
+        if embedding is None:
+            return
+        if any(
+            isinstance(call["result"], dict) and call["result"].get("success") is False
+            for call in result["tool_calls"]
+        ):
+            return
+        await asyncio.to_thread(self.answer_cache.store, embedding, message, result)
+
+    async def _complete(self, phase: str, **kwargs):
+        """Run a chat completion without blocking the event loop"""
+        # Bound in-flight requests so a burst can't exhaust the provider's rate limit
+        with span("llm.wait", phase=phase):
+            await self._semaphore.acquire()
+        try:
+            with span(f"llm.{phase}") as attributes:
+                provider, response = await self.router.complete(**kwargs)
+                attributes["provider"] = provider.name
+        finally:
+            self._semaphore.release()
+        record_usage(phase, getattr(response, "usage", None))
+        return response
+
+    async def chat_stream(
+        self,
+        message: str,
+        history: List[Dict[str, str]],
+        tools: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of chat: yields token and tool events as they happen,
+        then a final "done" event shaped like the chat() result
+        """
+        embedding, cached = await self._cached_answer(message, history)
+        if cached is not None:
+            yield {"type": "token", "content": cached["response"]}
+            yield {"type": "done", **cached}
+            return
+
+        messages = self._build_messages(message, history)
+        tool_calls_log = []
+
+        try:
+            content, tool_calls = "", []
+            async for event in self._stream_completion(
+                "first_completion",
+                messages=messages,
+                tools=tools if tools else None,
+                tool_choice="auto" if tools else None,
+                max_tokens=2000
+            ):
+                if event["type"] == "token":
+                    content += event["content"]
+                    yield event
+                else:
+                    tool_calls = event["tool_calls"]
+
+            if tool_calls:
+                for index, tool_call in enumerate(tool_calls):
+                    yield {
+                        "type": "tool_call_start",
+                        "index": index,
+                        "id": tool_call["id"],
+                        "name": tool_call["function"]["name"],
+                        "arguments": tool_call["function"]["arguments"]
+                    }
+
+                # Report each tool as soon as it finishes, whatever the order
+                tasks = [
+                    asyncio.ensure_future(self._run_indexed_tool_call(index, tool_call))
+                    for index, tool_call in enumerate(tool_calls)
+                ]
+                results = [None] * len(tool_calls)
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        index, (tool_args, tool_result) = await next_done
+                        results[index] = (tool_args, tool_result)
+                        yield {
+                            "type": "tool_call_end",
+                            "index": index,
+                            "id": tool_calls[index]["id"],
+                            "name": tool_calls[index]["function"]["name"],
+                            "result": tool_result
+                        }
+                finally:
+                    # Client disconnected mid-stream: don't leave tools running
+                    for task in tasks:
+                        task.cancel()
+
+                tool_calls_log = self._append_tool_results(messages, content or None, tool_calls, results)
+
+                # Stream the final answer after tool execution
+                content = ""
+                async for event in self._stream_completion("second_completion", messages=messages, max_tokens=2000):
+                    if event["type"] == "token":
+                        content += event["content"]
+                        yield event
+
+            result = {
+                "response": content,
+                "tool_calls": tool_calls_log
+            }
+            await self._remember_answer(embedding, message, result)
+            yield {"type": "done", **result}
+
+        except Exception as e:
+            record_error("chat_stream", e)
+            print(f"❌ Chat stream failed: {type(e).__name__}: {e}")
+            yield {
+                "type": "done",
+                "response": f"Error: {str(e)}",
+                "tool_calls": [],
+                "error": f"{type(e).__name__}: {e}"
+            }
+
+    async def _stream_completion(self, phase: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat completion as token events plus one tool_calls event"""
+        tool_calls = {}
+
+        # Hold the concurrency slot for as long as the stream is open
+        with span("llm.wait", phase=phase):
+            await self._semaphore.acquire()
+        try:
+            with span(f"llm.{phase}") as attributes:
+                started = time.perf_counter()
+                provider, stream = await self.router.stream(**kwargs)
+                attributes["provider"] = provider.name
+                async for chunk in stream:
+                    # Groq reports usage on the final chunk, under x_groq
+                    usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                    record_usage(phase, usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+
+                    if delta.content:
+                        if "first_token_ms" not in attributes:
+                            attributes["first_token_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                        yield {"type": "token", "content": delta.content}
+
+                    # Tool calls arrive as fragments keyed by index
+                    for fragment in delta.tool_calls or []:
+                        tool_call = tool_calls.setdefault(fragment.index, {
+                            "id": None,
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""}
+                        })
+                        if fragment.id:
+                            tool_call["id"] = fragment.id
+                        if fragment.function and fragment.function.name:
+                            tool_call["function"]["name"] += fragment.function.name
+                        if fragment.function and fragment.function.arguments:
+                            tool_call["function"]["arguments"] += fragment.function.arguments
+        finally:
+            self._semaphore.release()
+
+        yield {"type": "tool_calls", "tool_calls": [tool_calls[i] for i in sorted(tool_calls)]}
+
+    def _append_tool_results(
+        self,
+        messages: List[Dict[str, Any]],
+        content: Optional[str],
+        tool_calls: List[Dict[str, Any]],
+        results: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Add one assistant message carrying every tool call, then the results in order"""
+        tool_calls_log = []
+        messages.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": tool_calls
+        })
+
+        # The model sees results fitted to the token budgets...
+        with span("compact_results"):
+            contents = self.compactor.compact_turn(
+                [tool_call["function"]["name"] for tool_call in tool_calls],
+                [tool_result for _, tool_result in results],
+                [tool_args for tool_args, _ in results]
+            )
+        for tool_call, (tool_args, tool_result), tool_content in zip(tool_calls, results, contents):
+            # ...while the log keeps the full result for transparency
+            tool_calls_log.append({
+                "name": tool_call["function"]["name"],
+                "arguments": tool_args,
+                "result": tool_result
+            })
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "content": tool_content
+            })
+        return tool_calls_log
+
+    async def _run_indexed_tool_call(self, index: int, tool_call: Dict[str, Any]):
+        return index, await self._run_tool_call(tool_call)
+
+    async def _run_tool_call(self, tool_call: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Execute one tool call with its timeout, turning failures into error results"""
+        tool_name = tool_call["function"]["name"]
+        try:
+            tool_args = json.loads(tool_call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError as e:
+            return {}, {"success": False, "error": f"Invalid arguments for {tool_name}: {e}"}
+
+        timeout = self.tool_timeouts.get(tool_name, self.tool_timeout)
+        try:
+            tool_result = await asyncio.wait_for(self._execute_tool(tool_name, tool_args), timeout)
+        except asyncio.TimeoutError:
+            tool_result = {"success": False, "error": f"Tool {tool_name} timed out after {timeout:g}s"}
+        except Exception as e:
+            # One failing tool shouldn't sink the others from the same turn
+            tool_result = {"success": False, "error": str(e)}
+        return tool_args, tool_result
+
+    @staticmethod
+    def _parse_overrides(spec: str) -> Dict[str, float]:
+        """Parse per-tool overrides like "name=value,name=value" into a dict"""
+        overrides = {}
+        for item in spec.split(","):
+            if "=" in item:
+                name, value = item.split("=", 1)
+                overrides[name.strip()] = float(value)
+        return overrides
+
+    async def aclose(self):
+        """Close the shared HTTP connection pool"""
+        await self.router.aclose()
+        await self.http_client.aclose()
+    
     def _build_messages(self, message: str, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Build message array from history"""
         messages = [
@@ -103,6 +395,7 @@ class LLMService:
             - First check if the document is indexed using doc_list
             - If not indexed, use doc_index to index it first
             - Then use doc_search with the user's question to find relevant content
+            - For exact names, IDs or labels (e.g. "SKU-1042", "Q3 2024"), call doc_search with mode "lexical"
             - Answer based on the search results
 
             Use files_read only when the user explicitly asks to "read" a file or wants the raw content.
@@ -0,0 +1,228 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import math
+import threading
+import time
+
+# Seconds; spans range from sub-millisecond cache hits to minute-long completions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help: str, read: Callable[[], Any], labels: Tuple[str, ...] = ()):
+        """Read at scrape time; read() returns a number, or {label values tuple: number} when labelled"""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.read = read
+
+    def render(self) -> List[str]:
+        value = self.read()
+        if value is None:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if isinstance(value, dict):
+            for key, number in sorted(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(number)}")
+        else:
+            lines.append(f"{self.name} {_number(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        """Prometheus text-format metrics without the prometheus_client dependency"""
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], Any], labels: Tuple[str, ...] = ()) -> Gauge:
+        """Register (or replace) a gauge computed at scrape time"""
+        gauge = Gauge(name, help, read, labels)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken gauge shouldn't take down the whole scrape
+                print(f"⚠️ Metric {metric.name} not rendered: {e}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+SPAN_SECONDS = metrics.histogram(
+    "copilot_span_seconds", "Duration of chat pipeline phases (completions, tools, queries, searches)", ("span",)
+)
+LLM_TOKENS = metrics.counter("copilot_llm_tokens_total", "Tokens reported by the LLM provider", ("phase", "kind"))
+ERRORS = metrics.counter("copilot_errors_total", "Errors caught and turned into error results", ("where",))
+
+class Trace:
+    def __init__(self):
+        """Phase timings and token counts for one chat request"""
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.tokens: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()  # Spans also arrive from worker threads
+
+    def add(self, name: str, started: float, duration: float, attributes: Dict[str, Any]):
+        span = {
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 2),
+            "duration_ms": round(duration * 1000, 2),
+        }
+        span.update(attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def add_tokens(self, kind: str, count: int):
+        with self._lock:
+            self.tokens[kind] = self.tokens.get(kind, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+                "spans": spans,
+                "tokens": dict(self.tokens),
+                "error": self.error,
+            }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def start_trace() -> Trace:
+    """Collect spans for the current request; tasks and to_thread calls started from here inherit it"""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Dict[str, Any]]:
+    """Time a block into copilot_span_seconds and, when tracing, the request's trace
+
+    Yields the attribute dict so the block can attach results (row counts,
+    outcome) before the span is recorded.
+    """
+    started = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        SPAN_SECONDS.observe(duration, span=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, started, duration, attributes)
+
+def record_usage(phase: str, usage: Any):
+    """Count prompt/completion tokens from a provider usage object, if it sent one"""
+    if usage is None:
+        return
+    trace = _current_trace.get()
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None)
+        if count is None and isinstance(usage, dict):
+            count = usage.get(kind)
+        if count:
+            LLM_TOKENS.inc(count, phase=phase, kind=kind.split("_")[0])
+            if trace is not None:
+                trace.add_tokens(kind, count)
+
+def record_error(where: str, error: BaseException):
+    ERRORS.inc(where=where)
+    trace = _current_trace.get()
+    if trace is not None and trace.error is None:
+        trace.error = f"{type(error).__name__}: {error}"
@@ -0,0 +1,328 @@
+from typing import Any, Dict, List, Optional
+import glob
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+SEARCH_BLOCK_ROWS = int(os.getenv("VECTOR_INDEX_BLOCK_ROWS", "4096"))
+COMPACT_RATIO = float(os.getenv("VECTOR_INDEX_COMPACT_RATIO", "0.25"))
+
+class NumpyIndex:
+    """Exact vector index over memory-mapped, append-only embedding files
+
+    Speaks the subset of the Chroma collection API that VectorStore uses
+    (get/upsert/update/delete/query/count), so it can stand in for Chroma.
+    Vectors live in one contiguous float16 (or int8 + per-row scale) file that
+    is mmapped on open; text and metadata live in a small SQLite table.
+    """
+
+    def __init__(self, directory: str, dtype: Optional[str] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "meta.db"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id TEXT PRIMARY KEY,
+                    row INTEGER UNIQUE NOT NULL,
+                    filename TEXT,
+                    document TEXT,
+                    metadata TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_filename ON chunks (filename)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        # An existing index keeps the dtype it was built with
+        self.dtype = self._get_meta("dtype") or dtype or os.getenv("VECTOR_INDEX_DTYPE", "float16")
+        if self.dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported vector index dtype: {self.dtype}")
+        self._set_meta("dtype", self.dtype)
+        self.dim = int(self._get_meta("dim") or 0)
+        self.rows = int(self._get_meta("rows") or 0)
+        self.generation = int(self._get_meta("generation") or 0)
+
+        self._discard_stale_files()
+        self._remap()
+
+    # ---- storage ----
+
+    def _path(self, name: str, generation: Optional[int] = None) -> str:
+        gen = self.generation if generation is None else generation
+        return os.path.join(self.directory, f"{name}.{gen}.bin")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _discard_stale_files(self):
+        """Drop files from other generations and bytes past the last committed row (crash leftovers)"""
+        current = {self._path(name) for name in ("vectors", "scales", "norms", "live")}
+        for path in glob.glob(os.path.join(self.directory, "*.bin")):
+            if path not in current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Still mapped (e.g. on Windows); removed on the next open
+        for name, width in self._row_widths().items():
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > self.rows * width:
+                os.truncate(path, self.rows * width)
+
+    def _row_widths(self) -> Dict[str, int]:
+        """Bytes per row in each file"""
+        widths = {"vectors": self.dim * np.dtype(self.dtype).itemsize, "norms": 4, "live": 1}
+        if self.dtype == "int8":
+            widths["scales"] = 4
+        return widths
+
+    def _map(self, name: str, dtype, shape, mode: str = "r"):
+        if self.rows == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode=mode, shape=shape)
+
+    def _remap(self):
+        """Map the current files; zero-copy, so opening a large index is instant"""
+        self._vectors = self._map("vectors", self.dtype, (self.rows, self.dim))
+        self._scales = self._map("scales", np.float32, (self.rows,)) if self.dtype == "int8" else None
+        self._norms = self._map("norms", np.float32, (self.rows,))
+        self._live = self._map("live", np.uint8, (self.rows,), mode="r+")
+
+    def _encode(self, embeddings: np.ndarray):
+        """Quantize float32 rows; returns stored rows, per-row scales and squared norms of what is stored"""
+        if self.dtype == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            stored = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+            decoded = stored.astype(np.float32) * scales[:, None]
+        else:
+            scales = None
+            stored = embeddings.astype(np.float16)
+            decoded = stored.astype(np.float32)
+        norms = np.einsum("ij,ij->i", decoded, decoded).astype(np.float32)
+        return stored, scales.astype(np.float32) if scales is not None else None, norms
+
+    def _decode(self, rows: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _append(self, stored: np.ndarray, scales: Optional[np.ndarray], norms: np.ndarray):
+        """Append rows to the end of every file"""
+        parts = {"vectors": stored, "norms": norms, "live": np.ones(len(stored), dtype=np.uint8)}
+        if scales is not None:
+            parts["scales"] = scales
+        for name, array in parts.items():
+            with open(self._path(name), "ab") as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    def _tombstone(self, rows: List[int]):
+        if rows:
+            self._live[rows] = 0
+            if isinstance(self._live, np.memmap):
+                self._live.flush()
+
+    # ---- Chroma-compatible API ----
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Append new versions of the given chunks; older versions become tombstones"""
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self.dim == 0:
+                self.dim = matrix.shape[1]
+                self._set_meta("dim", self.dim)
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+
+            stored, scales, norms = self._encode(matrix)
+            self._append(stored, scales, norms)
+
+            first = self.rows
+            last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+            old_rows = self._rows_for(ids) + [first + i for i, chunk_id in enumerate(ids) if last[chunk_id] != i]
+            with self._conn:
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (id, row, filename, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                    [(chunk_id, first + i, meta.get("filename"), doc, json.dumps(meta))
+                     for i, (chunk_id, doc, meta) in enumerate(zip(ids, documents, metadatas))]
+                )
+                # Committing the row count is what makes the appended bytes visible
+                self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('rows', ?)", (str(first + len(ids)),))
+            self.rows = first + len(ids)
+            self._remap()
+            self._tombstone(old_rows)
+            self._maybe_compact()
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Replace metadata in place; vectors are untouched"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET filename = ?, metadata = ? WHERE id = ?",
+                [(meta.get("filename"), json.dumps(meta), chunk_id) for chunk_id, meta in zip(ids, metadatas)]
+            )
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            rows = self._rows_for(ids)
+            with self._conn:
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._tombstone(rows)
+            self._maybe_compact()
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Fetch chunks by id or by filename (the only metadata filter VectorStore uses)"""
+        include = include if include is not None else ["metadatas", "documents"]
+        sql, params = "SELECT id, row, document, metadata FROM chunks", []
+        if ids is not None:
+            sql += f" WHERE id IN ({','.join('?' * len(ids))})"
+            params = list(ids)
+        elif where:
+            if set(where) != {"filename"}:
+                raise ValueError("NumpyIndex only supports filtering by filename")
+            sql += " WHERE filename = ?"
+            params = [where["filename"]]
+
+        with self._lock:
+            records = self._conn.execute(sql + " ORDER BY row", params).fetchall()
+            embeddings = self._decode(np.array([r[1] for r in records], dtype=np.int64)).tolist() if "embeddings" in include else None
+        return {
+            "ids": [r[0] for r in records],
+            "documents": [r[2] for r in records] if "documents" in include else None,
+            "metadatas": [json.loads(r[3]) for r in records] if "metadatas" in include else None,
+            "embeddings": embeddings,
+        }
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10) -> Dict[str, Any]:
+        """Exact top-k by squared L2 distance (Chroma's default metric)
+
+        Scoring runs outside the lock on a snapshot of the arrays; if compact()
+        renumbered the rows meanwhile, the snapshot's row numbers no longer
+        match the chunks table and the query starts over on the new generation.
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        while True:
+            with self._lock:
+                generation = self.generation
+                vectors, scales, norms, live = self._vectors, self._scales, self._norms, self._live
+
+            tops = []
+            for distances in self._distances(queries, vectors, scales, norms, live):
+                k = min(n_results, int(np.isfinite(distances).sum()))
+                top = np.argpartition(distances, k - 1)[:k] if k else np.array([], dtype=np.int64)
+                tops.append((top[np.argsort(distances[top])], distances))
+
+            with self._lock:
+                if self.generation != generation:
+                    continue
+                records = [
+                    {r[1]: r for r in self._conn.execute(
+                        f"SELECT id, row, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(top))})",
+                        [int(row) for row in top]
+                    ).fetchall()}
+                    for top, _ in tops
+                ]
+            break
+
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for (top, distances), rows in zip(tops, records):
+            hits = [(rows[int(row)], float(distances[row])) for row in top if int(row) in rows]
+            out["ids"].append([r[0] for r, _ in hits])
+            out["documents"].append([r[2] for r, _ in hits])
+            out["metadatas"].append([json.loads(r[3]) for r, _ in hits])
+            out["distances"].append([d for _, d in hits])
+        return out
+
+    @staticmethod
+    def _distances(queries: np.ndarray, vectors, scales, norms, live) -> np.ndarray:
+        """|q - x|^2 = |q|^2 + |x|^2 - 2 q.x for every query and row
+
+        Works through cache-sized blocks so each block is decoded to float32
+        once for all queries, and the full matrix is never materialized.
+        """
+        distances = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+            end = start + SEARCH_BLOCK_ROWS
+            dots = vectors[start:end].astype(np.float32) @ queries.T
+            if scales is not None:
+                dots *= scales[start:end, None]
+            distances[:, start:end] = (norms[start:end, None] - 2.0 * dots).T
+        distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+        distances[:, live == 0] = np.inf
+        return distances
+
+    def _rows_for(self, ids: List[str]) -> List[int]:
+        placeholders = ",".join("?" * len(ids))
+        return [r[0] for r in self._conn.execute(f"SELECT row FROM chunks WHERE id IN ({placeholders})", list(ids))]
+
+    # ---- maintenance ----
+
+    def _maybe_compact(self):
+        dead = self.rows - self.count()
+        if self.rows and dead / self.rows > COMPACT_RATIO:
+            self.compact()
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the files without tombstoned rows
+
+        New files are written under the next generation number and switched to
+        by one SQLite commit, so a crash mid-way leaves the old index intact.
+        """
+        with self._lock:
+            keep = np.array(
+                [r[0] for r in self._conn.execute("SELECT row FROM chunks ORDER BY row")], dtype=np.int64
+            )
+            before = self.rows
+            generation = self.generation + 1
+            arrays = {"vectors": self._vectors, "norms": self._norms, "scales": self._scales}
+            for name, array in arrays.items():
+                if array is None:
+                    continue
+                with open(self._path(name, generation), "wb") as f:
+                    for start in range(0, len(keep), SEARCH_BLOCK_ROWS):
+                        f.write(np.ascontiguousarray(array[keep[start:start + SEARCH_BLOCK_ROWS]]).tobytes())
+            with open(self._path("live", generation), "wb") as f:
+                f.write(np.ones(len(keep), dtype=np.uint8).tobytes())
+
+            with self._conn:
+                # Rows only ever move down, so renumbering in ascending order never collides
+                self._conn.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?", [(new, int(old)) for new, old in enumerate(keep)]
+                )
+                self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('rows', ?)", (str(len(keep)),))
+                self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('generation', ?)", (str(generation),))
+
+            self.generation = generation
+            self.rows = len(keep)
+            self._remap()
+            self._discard_stale_files()
+            return {"rows_before": before, "rows_after": self.rows}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = self.count()
+            widths = self._row_widths()
+            return {
+                "dtype": self.dtype,
+                "dim": self.dim,
+                "rows": self.rows,
+                "live_rows": live,
+                "bytes_per_vector": sum(widths.values()),
+                "vector_bytes": self.rows * sum(widths.values()),
+            }
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+import json
+import os
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text and JSON)"""
+    return (len(text) + 3) // 4
+
+class ResultCompactor:
+    def __init__(
+        self,
+        tool_budget: Optional[int] = None,
+        turn_budget: Optional[int] = None,
+        tool_budgets: Optional[Dict[str, int]] = None
+    ):
+        """Shrink tool results to token budgets before they enter the LLM context"""
+        self.tool_budget = tool_budget or int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "4000"))
+        self.turn_budget = turn_budget or int(os.getenv("TURN_TOOL_TOKEN_BUDGET", "12000"))
+        self.tool_budgets = tool_budgets or {}
+
+    def compact_turn(self, tool_names: List[str], results: List[Any],
+                     arguments: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """Serialize one turn's tool results, each fitted to its share of the budgets
+
+        arguments are the tool calls' arguments, used to continue paged results.
+        """
+        serialized = [json.dumps(result, default=str) for result in results]
+        needs = [estimate_tokens(text) for text in serialized]
+        caps = [
+            min(need, self.tool_budgets.get(name, self.tool_budget))
+            for name, need in zip(tool_names, needs)
+        ]
+        budgets = self._share_budget(caps, self.turn_budget)
+        arguments = arguments or [{}] * len(results)
+
+        return [
+            text if need <= budget else self.compact(result, budget, args)
+            for result, text, need, budget, args in zip(results, serialized, needs, budgets, arguments)
+        ]
+
+    @staticmethod
+    def _share_budget(caps: List[int], total: int) -> List[int]:
+        """Split the turn budget: small results get what they need, large ones split the rest"""
+        budgets = [0] * len(caps)
+        remaining = total
+        pending = sorted(range(len(caps)), key=lambda i: caps[i])
+        while pending:
+            share = remaining // len(pending)
+            i = pending.pop(0)
+            budgets[i] = min(caps[i], share)
+            remaining -= budgets[i]
+        return budgets
+
+    def compact(self, result: Any, budget: int, arguments: Optional[Dict[str, Any]] = None) -> str:
+        """Fit one result into `budget` tokens, marking everything that was cut"""
+        if isinstance(result, dict) and "has_more" in result:
+            text = self._compact_page(result, budget, arguments or {})
+            if text is not None:
+                return text
+        if isinstance(result, dict):
+            compacted = dict(result)
+            originals = {}
+            budgets_tried = {}
+            notes = {}
+
+            # Repeatedly shrink the largest field until the whole result fits
+            for _ in range(8):
+                text = json.dumps(compacted, default=str)
+                overflow = estimate_tokens(text) - budget
+                if overflow <= 0:
+                    break
+
+                key, value = max(
+                    ((k, v) for k, v in compacted.items() if isinstance(v, (list, str)) and v),
+                    key=lambda item: len(json.dumps(item[1], default=str)),
+                    default=(None, None)
+                )
+                if key is None:
+                    break
+
+                # Always cut from the original so markers never nest
+                original = originals.setdefault(key, value)
+                field_budget = max(estimate_tokens(json.dumps(value, default=str)) - overflow, 0)
+                if key in budgets_tried and field_budget >= budgets_tried[key]:
+                    field_budget = int(budgets_tried[key] * 0.9)
+                budgets_tried[key] = field_budget
+                if isinstance(original, list):
+                    compacted[key] = self._sample_list(original, field_budget)
+                    notes[key] = f"sampled {len(compacted[key])} of {len(original)} items"
+                else:
+                    compacted[key] = self._truncate_text(original, field_budget)
+                    notes[key] = f"truncated from {len(original)} characters"
+
+                compacted["_compacted"] = notes
+
+            text = json.dumps(compacted, default=str)
+            if estimate_tokens(text) <= budget:
+                return text
+        else:
+            text = json.dumps(result, default=str)
+
+        return self._truncate_text(text, budget)
+
+    def _compact_page(self, result: Dict[str, Any], budget: int, arguments: Dict[str, Any]) -> Optional[str]:
+        """Cut a paged result to the longest prefix that fits, and point its continuation at the first item cut
+
+        Sampling or truncating a page in the middle would lose what was cut for
+        good, since next_cursor / next_offset / next_line still point past the
+        whole page. Text pages (files_read) are cut by characters, list pages by items.
+        """
+        if isinstance(result.get("content"), str) and result["content"]:
+            key, items = "content", result["content"]
+        else:
+            lists = [(key, value) for key, value in result.items() if isinstance(value, list) and value]
+            if not lists:
+                return None
+            key, items = max(lists, key=lambda item: len(json.dumps(item[1], default=str)))
+
+        # Binary search for the most leading items that fit
+        best, low, high = None, 0, len(items) - 1
+        while low <= high:
+            kept = (low + high) // 2
+            text = json.dumps(self._page_prefix(result, key, kept, arguments), default=str)
+            if estimate_tokens(text) <= budget:
+                best, low = text, kept + 1
+            else:
+                high = kept - 1
+        return best
+
+    @staticmethod
+    def _page_prefix(result: Dict[str, Any], key: str, kept: int, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if key == "content":
+            return ResultCompactor._text_prefix(result, kept)
+        page = {**result, key: result[key][:kept], "has_more": True}
+        if "count" in page:
+            page["count"] = kept
+        start = result.get("offset", arguments.get("offset") or 0)
+        if "next_cursor" in result:
+            from mcp_tools.db_tools import encode_cursor
+            page["next_cursor"] = encode_cursor(arguments.get("query", ""), start + kept)
+            continuation = "next_cursor"
+        else:
+            page["next_offset"] = start + kept
+            continuation = "next_offset"
+        page["_compacted"] = {key: f"first {kept} of {len(result[key])} items; {continuation} continues from the next one"}
+        return page
+
+    @staticmethod
+    def _text_prefix(result: Dict[str, Any], kept: int) -> Dict[str, Any]:
+        """Leading part of a files_read page, resuming by line when whole lines fit, else by byte offset"""
+        content = result["content"][:kept]
+        page = {**result, "has_more": True}
+        for key in ("next_offset", "next_line", "truncated_line"):
+            page.pop(key, None)
+        if "start_line" in result and "\n" in content:
+            content = content[:content.rindex("\n") + 1]
+            page["end_line"] = result["start_line"] + content.count("\n") - 1
+            page["next_line"] = page["end_line"] + 1
+            continuation = f"next_line {page['next_line']}"
+        else:
+            page.pop("end_line", None)
+            page["next_offset"] = result.get("offset", 0) + len(content.encode("utf-8"))
+            continuation = f"next_offset {page['next_offset']}"
+        page.update(content=content, size=len(content))
+        page["_compacted"] = {"content": f"first {len(content)} of {len(result['content'])} characters; continue from {continuation}"}
+        return page
+
+    @staticmethod
+    def _sample_list(items: List[Any], budget: int) -> List[Any]:
+        """Evenly spaced sample (always keeping the first and last item) that fits the budget"""
+        per_item = estimate_tokens(json.dumps(items, default=str)) / len(items)
+        count = min(len(items), max(1, int(budget / max(per_item, 1))))
+
+        while True:
+            if count == 1:
+                sample = items[:1]
+            else:
+                step = (len(items) - 1) / (count - 1)
+                sample = [items[round(i * step)] for i in range(count)]
+            if count == 1 or estimate_tokens(json.dumps(sample, default=str)) <= budget:
+                return sample
+            count = max(1, int(count * 0.8))
+
+    @staticmethod
+    def _truncate_text(text: str, budget: int) -> str:
+        """Keep the head of a string and say how much was cut"""
+        limit = max(budget * 4 - 80, 0)
+        if len(text) <= limit:
+            return text
+
+        # Escaped characters (newlines, quotes) grow when the result is JSON-encoded
+        keep = limit
+        encoded = len(json.dumps(text[:keep])) - 2
+        if encoded > limit:
+            keep = int(keep * limit / encoded)
+        return text[:keep] + f"\n...[truncated {len(text) - keep} of {len(text)} characters]"
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import threading
+import uuid
+
+from services.cache import LRUCache
+from services.result_compactor import estimate_tokens
+
+class Session:
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.summary = ""
+        self.messages: List[Dict[str, str]] = []
+        self.lock = threading.Lock()
+        # Held for a whole chat turn, so concurrent requests on one session run one after another
+        self.turn_lock = asyncio.Lock()
+
+class SessionStore:
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        history_token_budget: Optional[int] = None,
+        keep_recent: Optional[int] = None
+    ):
+        """Server-side conversation history with LRU/TTL eviction and automatic condensing"""
+        self.history_token_budget = history_token_budget or int(os.getenv("SESSION_HISTORY_TOKEN_BUDGET", "3000"))
+        self.keep_recent = keep_recent or int(os.getenv("SESSION_KEEP_RECENT", "6"))
+        self._sessions = LRUCache(
+            max_entries=max_sessions or int(os.getenv("SESSION_MAX", "1000")),
+            ttl=ttl_seconds or float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+        )
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """Return a live session, or a new one if the ID is missing, unknown or expired"""
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            session = Session(uuid.uuid4().hex)
+            self._sessions.set(session.id, session)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id) is not None
+
+    def history(self, session: Session) -> List[Dict[str, str]]:
+        """Messages to send the model: condensed summary first, then recent turns verbatim"""
+        with session.lock:
+            history = []
+            if session.summary:
+                history.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation:\n{session.summary}"
+                })
+            history.extend(session.messages)
+            return history
+
+    def append(self, session: Session, user_message: str, assistant_message: str):
+        """Record one exchange, condensing older turns once over the token budget"""
+        with session.lock:
+            session.messages.append({"role": "user", "content": user_message})
+            session.messages.append({"role": "assistant", "content": assistant_message or ""})
+            self._condense(session)
+
+    def _condense(self, session: Session):
+        """Fold the oldest messages into the summary until history fits the budget"""
+        def tokens():
+            return estimate_tokens(session.summary) + sum(
+                estimate_tokens(message["content"]) for message in session.messages
+            )
+
+        while tokens() > self.history_token_budget and len(session.messages) > self.keep_recent:
+            message = session.messages.pop(0)
+            speaker = "User" if message["role"] == "user" else "Assistant"
+            line = " ".join(message["content"].split())
+            if len(line) > 200:
+                line = line[:200] + "..."
+            session.summary = f"{session.summary}\n- {speaker}: {line}".strip()
+
+        # The summary itself is capped at a third of the budget, dropping its oldest lines
+        max_chars = self.history_token_budget * 4 // 3
+        if len(session.summary) > max_chars:
+            lines = session.summary.split("\n")
+            while len(lines) > 1 and len("\n".join(lines)) > max_chars:
+                lines.pop(0)
+            session.summary = "\n".join(lines)[-max_chars:]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
@@ -1,128 +1,550 @@
-from sentence_transformers import SentenceTransformer
-import chromadb
-from chromadb.config import Settings
+# sentence_transformers (torch) and chromadb are imported lazily: they take
+# seconds to import and aren't installed in the slim deployment image
 import os
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+from services.document_catalog import DocumentCatalog
+from services.lexical_index import LexicalIndex
+from services.metrics import span
+from concurrent.futures import ProcessPoolExecutor
 import hashlib
+import threading
+import time
+
+INDEXABLE_EXTENSIONS = {'.txt', '.csv', '.md'}
+
+# "chroma" (default) or "numpy": the in-process mmapped index in services/numpy_index.py
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+
+# Default doc_search mode: "semantic", "lexical" (BM25 only, no model) or "hybrid"
+SEARCH_MODE = os.getenv("DOC_SEARCH_MODE", "hybrid").lower()
+RRF_K = 60  # Reciprocal rank fusion constant
+
+# Files larger than this are streamed through index_file instead of being chunked whole in a worker
+STREAM_THRESHOLD_BYTES = int(os.getenv("INDEX_STREAM_THRESHOLD_BYTES", str(8 * 1024 * 1024)))
+READ_SIZE = 1 << 16  # Characters per read when streaming a file
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int = 500, overlap: int = 50) -> Iterator[str]:
+    """Split text arriving in pieces into overlapping chunks, preferring sentence/newline boundaries
+    
+    Only about one chunk plus one piece of text is held at a time.
+    """
+    pieces = iter(pieces)
+    buffer, start, exhausted = "", 0, False
+    
+    while True:
+        # Read ahead until we know whether the text continues past this chunk
+        while not exhausted and len(buffer) - start <= chunk_size:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            else:
+                buffer = buffer[start:] + piece
+                start = 0
+        if start >= len(buffer):
+            return
+        
+        end = start + chunk_size
+        chunk = buffer[start:end]
+        
+        # Try to break at sentence boundary
+        if end < len(buffer):
+            last_period = chunk.rfind('.')
+            last_newline = chunk.rfind('\n')
+            break_point = max(last_period, last_newline)
+            
+            if break_point > chunk_size * 0.5:  # At least 50% through
+                chunk = chunk[:break_point + 1]
+                end = start + break_point + 1
+        
+        yield chunk.strip()
+        start = end - overlap
+
+def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
+    """Split text into overlapping chunks, preferring sentence/newline boundaries"""
+    return list(iter_chunks([text], chunk_size, overlap))
+
+def read_text(path: str, read_size: int = READ_SIZE) -> Iterator[str]:
+    """Yield a UTF-8 text file in pieces of read_size characters"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for piece in iter(lambda: f.read(read_size), ''):
+            yield piece
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+def _chunk_file(path: str, chunk_size: int, overlap: int) -> Tuple[str, List[str], str, int]:
+    """Read and chunk one file (runs in a worker process)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return Path(path).name, chunk_text(content, chunk_size, overlap), _content_hash(content), len(content.encode('utf-8'))
+
+def _chunk_id(filename: str, index: int) -> str:
+    doc_id = hashlib.md5(filename.encode()).hexdigest()[:8]
+    return f"{doc_id}_chunk_{index}"
+
+def _chunk_metadata(filename: str, index: int, total: int, chunk_hash: str, doc_hash: str) -> Dict[str, Any]:
+    return {
+        "filename": filename,
+        "chunk_index": index,
+        "total_chunks": total,
+        "chunk_hash": chunk_hash,
+        "doc_hash": doc_hash
+    }
 
 class VectorStore:
-    def __init__(self, persist_directory: str = "./chroma_data"):
-        """Initialize vector store with Hugging Face embeddings"""
-        # Initialize embedding model (local, free!)
-        print("Loading embedding model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("✅ Embedding model loaded")
-        
-        # Create persist directory if it doesn't exist
-        import os
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Initialize ChromaDB with persistence
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name="documents",
-            metadata={"description": "Document chunks with embeddings"}
-        )
+    def __init__(self, persist_directory: str = "./chroma_data", model_name: str = 'all-MiniLM-L6-v2', backend: Optional[str] = None):
+        """Initialize vector store with Hugging Face embeddings
+        
+        Construction is cheap: the embedding model and Chroma are loaded on first
+        use, or ahead of time by calling warm_up() from a background thread.
+        """
+        self.persist_directory = persist_directory
+        self.model_name = model_name
+        self.backend = (backend or VECTOR_BACKEND).lower()
+        if self.backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector backend: {self.backend}")
+        # The NumPy index keeps its files (and its own catalog) apart from Chroma's
+        self.data_directory = persist_directory if self.backend == "chroma" else os.path.join(persist_directory, "numpy_index")
+        self._model = None
+        self._collection = None
+        self._catalog = None
+        self._lexical = None
+        self._model_lock = threading.Lock()
+        self._collection_lock = threading.Lock()
+        self.load_error = None
         
-        print(f"✅ Vector store initialized at {persist_directory}")
+        # Cold-start measurements, reported by the readiness endpoint
+        self.timings: Dict[str, float] = {}
+    
+    @property
+    def model(self):
+        """Embedding model, loaded on first access"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    self.timings["model_import_s"] = round(time.perf_counter() - started, 3)
+                    
+                    # Initialize embedding model (local, free!)
+                    print("Loading embedding model...")
+                    started = time.perf_counter()
+                    self._model = SentenceTransformer(self.model_name)
+                    self.timings["model_load_s"] = round(time.perf_counter() - started, 3)
+                    print("✅ Embedding model loaded")
+        return self._model
+    
+    @property
+    def collection(self):
+        """Chroma collection (or the NumPy index standing in for it), opened on first access"""
+        if self._collection is None:
+            with self._collection_lock:
+                if self._collection is None and self.backend == "numpy":
+                    started = time.perf_counter()
+                    from services.numpy_index import NumpyIndex
+                    self._collection = NumpyIndex(self.data_directory)
+                    self.timings["index_open_s"] = round(time.perf_counter() - started, 3)
+                    print(f"✅ NumPy vector index opened at {self.data_directory}")
+                elif self._collection is None:
+                    started = time.perf_counter()
+                    import chromadb
+                    self.timings["chromadb_import_s"] = round(time.perf_counter() - started, 3)
+                    
+                    # Create persist directory if it doesn't exist
+                    os.makedirs(self.persist_directory, exist_ok=True)
+                    
+                    # Initialize ChromaDB with persistence
+                    started = time.perf_counter()
+                    self.client = chromadb.PersistentClient(path=self.persist_directory)
+                    
+                    # Get or create collection
+                    self._collection = self.client.get_or_create_collection(
+                        name="documents",
+                        metadata={"description": "Document chunks with embeddings"}
+                    )
+                    self.timings["chroma_open_s"] = round(time.perf_counter() - started, 3)
+                    print(f"✅ Vector store initialized at {self.persist_directory}")
+        return self._collection
+    
+    @property
+    def catalog(self) -> DocumentCatalog:
+        """Sidecar catalog of indexed documents (cheap: plain SQLite, no Chroma needed)"""
+        if self._catalog is None:
+            with self._collection_lock:
+                if self._catalog is None:
+                    self._catalog = DocumentCatalog(os.path.join(self.data_directory, "catalog.db"))
+        return self._catalog
+    
+    @property
+    def lexical(self) -> LexicalIndex:
+        """BM25 keyword index over the same chunks, updated alongside the embeddings"""
+        if self._lexical is None:
+            with self._collection_lock:
+                if self._lexical is None:
+                    self._lexical = LexicalIndex(os.path.join(self.data_directory, "lexical.db"))
+        return self._lexical
+    
+    @property
+    def is_warm(self) -> bool:
+        return self._model is not None and self._collection is not None
+    
+    def warm_up(self):
+        """Load the model and open Chroma, then run one encode to trigger lazy kernel setup"""
+        started = time.perf_counter()
+        try:
+            self.collection
+            self.model.encode(["warm up"])
+            self.timings["warm_up_s"] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"❌ Vector store warm-up failed: {e}")
     
     def _chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Split text into overlapping chunks"""
-        chunks = []
-        start = 0
-        text_len = len(text)
+        return chunk_text(text, chunk_size, overlap)
+    
+    def index_document(self, filename: str, content: str) -> Dict[str, Any]:
+        """Index a document by chunking and embedding it
         
-        while start < text_len:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Try to break at sentence boundary
-            if end < text_len:
-                last_period = chunk.rfind('.')
-                last_newline = chunk.rfind('\n')
-                break_point = max(last_period, last_newline)
-                
-                if break_point > chunk_size * 0.5:  # At least 50% through
-                    chunk = chunk[:break_point + 1]
-                    end = start + break_point + 1
-            
-            chunks.append(chunk.strip())
-            start = end - overlap
+        Re-indexing is incremental: an unchanged document is a no-op, and only
+        new or changed chunks are embedded before being upserted.
+        """
+        return self._index_stream(filename, lambda: [content])
+    
+    def index_file(self, path: str, filename: Optional[str] = None, batch_size: int = 256,
+                   chunk_size: int = 500, overlap: int = 50,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Index a file without loading it whole
         
-        return chunks
+        The file is read twice in pieces: once to fingerprint it and count its
+        chunks, then again to chunk, embed and write batch_size chunks at a
+        time, so memory stays flat however large the file is. progress, if
+        given, is called with (chunks_done, chunks_total) after each batch.
+        """
+        return self._index_stream(filename or Path(path).name, lambda: read_text(path), batch_size, chunk_size, overlap, progress)
     
-    def index_document(self, filename: str, content: str) -> Dict[str, Any]:
-        """Index a document by chunking and embedding it"""
+    def _index_stream(self, filename: str, open_pieces, batch_size: int = 256,
+                      chunk_size: int = 500, overlap: int = 50,
+                      progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Shared indexing path; open_pieces() returns a fresh iterable of the document's text"""
         try:
-            # Chunk the document
-            chunks = self._chunk_text(content)
-            
-            if not chunks:
-                return {"success": False, "error": "No content to index"}
+            # Pass 1: content hash, byte size and chunk count, keeping nothing
+            digest = hashlib.sha256()
+            byte_size = 0
             
-            # Generate embeddings
-            embeddings = self.model.encode(chunks).tolist()
+            def fingerprinted():
+                nonlocal byte_size
+                for piece in open_pieces():
+                    data = piece.encode('utf-8')
+                    digest.update(data)
+                    byte_size += len(data)
+                    yield piece
             
-            # Create unique IDs for each chunk
-            doc_id = hashlib.md5(filename.encode()).hexdigest()[:8]
-            ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
+            total = sum(1 for _ in iter_chunks(fingerprinted(), chunk_size, overlap))
+            if not total:
+                return {"success": False, "error": "No content to index"}
             
-            # Create metadata
-            metadatas = [
-                {
+            doc_hash = digest.hexdigest()[:32]
+            stored = self._stored_chunks(filename, doc_hash, total)
+            if stored is None:
+                return {
+                    "success": True,
                     "filename": filename,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "chunks_indexed": 0,
+                    "unchanged": True,
+                    "message": f"{filename} is already indexed and unchanged"
                 }
-                for i in range(len(chunks))
-            ]
             
-            # Add to ChromaDB
-            self.collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # Pass 2: plan, embed and write one bounded window of chunks at a time
+            ids_by_hash = {chunk_hash: chunk_id for chunk_id, chunk_hash in stored.items()}
+            counts = {"embedded": 0, "reused": 0}
+            window = []
+            for i, chunk in enumerate(iter_chunks(open_pieces(), chunk_size, overlap)):
+                window.append((i, chunk))
+                if len(window) >= batch_size:
+                    self._index_window(filename, window, total, doc_hash, stored, ids_by_hash, counts)
+                    window = []
+                    if progress:
+                        progress(i + 1, total)
+            if window:
+                self._index_window(filename, window, total, doc_hash, stored, ids_by_hash, counts)
+            if progress:
+                progress(total, total)
+            
+            # Trailing chunks from a longer previous version
+            orphans = self._orphans(filename, stored, total)
+            if orphans:
+                self.collection.delete(ids=orphans)
+                self.lexical.remove(orphans)
+            self.catalog.upsert(filename, total, doc_hash, byte_size)
             
             return {
                 "success": True,
                 "filename": filename,
-                "chunks_indexed": len(chunks),
-                "message": f"Indexed {len(chunks)} chunks from {filename}"
+                "chunks_indexed": total,
+                "embedded": counts["embedded"],
+                "reused": counts["reused"],
+                "deleted": len(orphans),
+                "message": f"Indexed {total} chunks from {filename} ({counts['embedded']} embedded)"
             }
         
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def search(self, query: str, top_k: int = 3) -> Dict[str, Any]:
-        """Search for relevant document chunks"""
+    def _index_window(self, filename: str, window: List[Tuple[int, str]], total: int, doc_hash: str,
+                      stored: Dict[str, str], ids_by_hash: Dict[str, str], counts: Dict[str, int]):
+        plan = self._plan_window(filename, window, total, doc_hash, stored, ids_by_hash)
+        
+        # Generate embeddings only for chunks we haven't seen before
+        if plan["to_embed"]:
+            with span("vector.embed_batch", chunks=len(plan["to_embed"])):
+                embeddings = self.model.encode([item["document"] for item in plan["to_embed"]], batch_size=len(window)).tolist()
+            for item, embedding in zip(plan["to_embed"], embeddings):
+                item["embedding"] = embedding
+        
+        self._apply_plan(plan, plan["to_embed"])
+        for item in plan["to_embed"] + plan["reused"]:
+            ids_by_hash[item["metadata"]["chunk_hash"]] = item["id"]
+        counts["embedded"] += len(plan["to_embed"])
+        counts["reused"] += len(plan["reused"])
+    
+    def _stored_chunks(self, filename: str, doc_hash: str, total: int) -> Optional[Dict[str, str]]:
+        """Stored chunk hashes by id, or None if the document is already indexed with this content"""
+        # Fast path: the catalog already has this exact content
+        if self.catalog.is_current(filename, doc_hash):
+            return None
+        
+        existing = self.collection.get(where={"filename": filename}, include=["metadatas"])
+        
+        # Fingerprint match on every stored chunk: nothing to do
+        if existing["ids"] and len(existing["ids"]) == total and all(
+            meta.get("doc_hash") == doc_hash for meta in existing["metadatas"]
+        ):
+            return None
+        
+        return {chunk_id: meta.get("chunk_hash") for chunk_id, meta in zip(existing["ids"], existing["metadatas"])}
+    
+    def _plan_update(self, filename: str, chunks: List[str], doc_hash: str) -> Dict[str, Any]:
+        """Diff a document's new chunks against what is stored for it"""
+        stored = self._stored_chunks(filename, doc_hash, len(chunks))
+        if stored is None:
+            return {"unchanged": True}
+        
+        ids_by_hash = {chunk_hash: chunk_id for chunk_id, chunk_hash in stored.items()}
+        plan = self._plan_window(filename, list(enumerate(chunks)), len(chunks), doc_hash, stored, ids_by_hash)
+        plan["delete"] = self._orphans(filename, stored, len(chunks))
+        return plan
+    
+    def _plan_window(self, filename: str, window: List[Tuple[int, str]], total: int, doc_hash: str,
+                     stored: Dict[str, str], ids_by_hash: Dict[str, str]) -> Dict[str, Any]:
+        """Sort a run of new chunks into embed / reuse / metadata-only against what is stored"""
+        plan = {"unchanged": False, "to_embed": [], "reused": [], "metadata_only": [], "delete": []}
+        
+        for i, chunk in window:
+            chunk_id = _chunk_id(filename, i)
+            chunk_hash = _content_hash(chunk)
+            item = {
+                "id": chunk_id,
+                "document": chunk,
+                "metadata": _chunk_metadata(filename, i, total, chunk_hash, doc_hash)
+            }
+            if stored.get(chunk_id) == chunk_hash:
+                # Same text in the same slot: only the document-level metadata changed
+                plan["metadata_only"].append(item)
+            elif chunk_hash in ids_by_hash:
+                # Text moved (e.g. a paragraph was inserted above): reuse its embedding
+                item["source_id"] = ids_by_hash[chunk_hash]
+                plan["reused"].append(item)
+            else:
+                plan["to_embed"].append(item)
+        
+        if plan["reused"]:
+            source_ids = list(dict.fromkeys(item["source_id"] for item in plan["reused"]))
+            sources = self.collection.get(ids=source_ids, include=["embeddings", "metadatas"])
+            found = {
+                chunk_id: (embedding, meta)
+                for chunk_id, embedding, meta in zip(sources["ids"], sources["embeddings"], sources["metadatas"])
+            }
+            reused = []
+            for item in plan["reused"]:
+                embedding, meta = found.get(item["source_id"], (None, {}))
+                # An earlier window may already have overwritten the source slot
+                if meta.get("chunk_hash") == item["metadata"]["chunk_hash"]:
+                    item["embedding"] = list(embedding)
+                    reused.append(item)
+                else:
+                    plan["to_embed"].append(item)
+            plan["reused"] = reused
+        
+        return plan
+    
+    @staticmethod
+    def _orphans(filename: str, stored: Dict[str, str], total: int) -> List[str]:
+        new_ids = {_chunk_id(filename, i) for i in range(total)}
+        return [chunk_id for chunk_id in stored if chunk_id not in new_ids]
+    
+    def _apply_plan(self, plan: Dict[str, Any], embedded: List[Dict[str, Any]]):
+        """Write a document's changes: upsert new/moved chunks, refresh metadata, drop orphans"""
+        upserts = embedded + plan["reused"]
+        if upserts:
+            self.collection.upsert(
+                ids=[item["id"] for item in upserts],
+                embeddings=[item["embedding"] for item in upserts],
+                documents=[item["document"] for item in upserts],
+                metadatas=[item["metadata"] for item in upserts]
+            )
+            self.lexical.add(upserts)
+        if plan["metadata_only"]:
+            self.collection.update(
+                ids=[item["id"] for item in plan["metadata_only"]],
+                metadatas=[item["metadata"] for item in plan["metadata_only"]]
+            )
+        if plan["delete"]:
+            self.collection.delete(ids=plan["delete"])
+            self.lexical.remove(plan["delete"])
+    
+    def index_directory(
+        self,
+        directory: str,
+        batch_size: int = 256,
+        workers: Optional[int] = None,
+        chunk_size: int = 500,
+        overlap: int = 50
+    ) -> Dict[str, Any]:
+        """Bulk-index every supported file in a directory
+        
+        Files are chunked in parallel worker processes while the main process
+        embeds new or changed chunks from all documents in fixed-size batches
+        and writes each batch to Chroma in a single call. Unchanged documents
+        are skipped. Files over STREAM_THRESHOLD_BYTES are streamed through
+        index_file instead, so one huge export can't exhaust memory.
+        """
+        paths = sorted(
+            str(p) for p in Path(directory).iterdir()
+            if p.is_file() and p.suffix.lower() in INDEXABLE_EXTENSIONS
+        )
+        large = [path for path in paths if os.path.getsize(path) > STREAM_THRESHOLD_BYTES]
+        paths = [path for path in paths if path not in large]
+        report = {
+            "success": True,
+            "files_indexed": 0,
+            "files_unchanged": 0,
+            "chunks_indexed": 0,
+            "chunks_embedded": 0,
+            "errors": {},
+            "timings": {"embed_s": 0.0, "write_s": 0.0}
+        }
+        started = time.perf_counter()
+        
+        batch = []  # chunks from any document still waiting for an embedding
+        pending = {}  # catalog entries for documents with chunks still in the batch
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_chunk_file, path, chunk_size, overlap) for path in paths]
+            for path, future in zip(paths, futures):
+                try:
+                    filename, chunks, doc_hash, byte_size = future.result()
+                    if not chunks:
+                        continue
+                    plan = self._plan_update(filename, chunks, doc_hash)
+                    if plan["unchanged"]:
+                        report["files_unchanged"] += 1
+                        continue
+                    
+                    # Everything except fresh embeddings can be written right away
+                    self._apply_plan(plan, [])
+                except Exception as e:
+                    report["errors"][Path(path).name] = str(e)
+                    continue
+                
+                batch.extend(plan["to_embed"])
+                pending[filename] = (len(chunks), doc_hash, byte_size)
+                report["files_indexed"] += 1
+                report["chunks_indexed"] += len(chunks)
+                
+                while len(batch) >= batch_size:
+                    self._write_batch(batch[:batch_size], batch_size, report)
+                    batch = batch[batch_size:]
+                    self._commit_catalog(pending, batch)
+        
+        if batch:
+            self._write_batch(batch, batch_size, report)
+        self._commit_catalog(pending, [])
+        
+        for path in large:
+            result = self.index_file(path, batch_size=batch_size, chunk_size=chunk_size, overlap=overlap)
+            if not result["success"]:
+                report["errors"][Path(path).name] = result["error"]
+            elif result.get("unchanged"):
+                report["files_unchanged"] += 1
+            else:
+                report["files_indexed"] += 1
+                report["chunks_indexed"] += result["chunks_indexed"]
+                report["chunks_embedded"] += result["embedded"]
+        
+        elapsed = time.perf_counter() - started
+        report["timings"]["total_s"] = round(elapsed, 3)
+        report["timings"]["embed_s"] = round(report["timings"]["embed_s"], 3)
+        report["timings"]["write_s"] = round(report["timings"]["write_s"], 3)
+        report["chunks_per_sec"] = round(report["chunks_embedded"] / elapsed, 1) if elapsed else 0.0
+        return report
+    
+    def _commit_catalog(self, pending: Dict[str, Tuple[int, str, int]], batch: List[Dict[str, Any]]):
+        """Record documents in the catalog once none of their chunks are waiting to be written"""
+        waiting = {item["metadata"]["filename"] for item in batch}
+        for filename in [name for name in pending if name not in waiting]:
+            chunk_count, doc_hash, byte_size = pending.pop(filename)
+            self.catalog.upsert(filename, chunk_count, doc_hash, byte_size)
+    
+    def _write_batch(self, batch: List[Dict[str, Any]], batch_size: int, report: Dict[str, Any]):
+        """Embed one cross-document batch of chunks and upsert it to Chroma in one call"""
+        started = time.perf_counter()
+        with span("vector.embed_batch", chunks=len(batch)):
+            embeddings = self.model.encode([item["document"] for item in batch], batch_size=batch_size).tolist()
+        report["timings"]["embed_s"] += time.perf_counter() - started
+        
+        started = time.perf_counter()
+        self.collection.upsert(
+            ids=[item["id"] for item in batch],
+            embeddings=embeddings,
+            documents=[item["document"] for item in batch],
+            metadatas=[item["metadata"] for item in batch]
+        )
+        self.lexical.add(batch)
+        report["timings"]["write_s"] += time.perf_counter() - started
+        report["chunks_embedded"] += len(batch)
+    
+    def search(self, query: str, top_k: int = 3, mode: Optional[str] = None) -> Dict[str, Any]:
+        """Search for relevant document chunks
+        
+        "lexical" answers from the BM25 index without running the model (best for
+        exact terms like product names or quarter labels), "semantic" is pure
+        vector search, and "hybrid" fuses both rankings.
+        """
         try:
-            # Generate query embedding
-            query_embedding = self.model.encode([query])[0].tolist()
+            mode = (mode or SEARCH_MODE).lower()
+            if mode not in ("semantic", "lexical", "hybrid"):
+                return {"success": False, "error": f"Unknown search mode: {mode}"}
             
-            # Search ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k
-            )
+            with span("vector.search", mode=mode):
+                if mode == "semantic":
+                    matches = self._semantic_matches(query, top_k)
+                else:
+                    self._backfill_lexical()
+                    if mode == "lexical":
+                        matches = self._lexical_matches(query, top_k)
+                    else:
+                        # Look deeper than top_k in both lists so fusion has candidates to rerank
+                        depth = max(top_k * 5, 20)
+                        matches = self._fuse(self._lexical_matches(query, depth), self._semantic_matches(query, depth))[:top_k]
             
-            # Format results
-            matches = []
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    matches.append({
-                        "text": doc,
-                        "filename": results['metadatas'][0][i]['filename'],
-                        "chunk_index": results['metadatas'][0][i]['chunk_index'],
-                        "distance": results['distances'][0][i] if 'distances' in results else None
-                    })
+            for match in matches:
+                match.pop("id", None)
             
             return {
                 "success": True,
                 "query": query,
+                "mode": mode,
                 "matches": matches,
                 "count": len(matches)
             }
@@ -130,23 +552,98 @@ class VectorStore:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def list_indexed_documents(self) -> Dict[str, Any]:
-        """List all indexed documents"""
+    def _lexical_matches(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        with span("vector.lexical_search"):
+            return self.lexical.search(query, top_k)
+    
+    def _semantic_matches(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        # Generate query embedding
+        with span("vector.embed_query"):
+            query_embedding = self.model.encode([query])[0].tolist()
+        
+        # Search ChromaDB
+        with span("vector.query"):
+            results = self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=top_k
+            )
+        
+        # Format results
+        matches = []
+        if results['documents'] and results['documents'][0]:
+            for i, doc in enumerate(results['documents'][0]):
+                matches.append({
+                    "id": results['ids'][0][i],
+                    "text": doc,
+                    "filename": results['metadatas'][0][i]['filename'],
+                    "chunk_index": results['metadatas'][0][i]['chunk_index'],
+                    "distance": results['distances'][0][i] if 'distances' in results else None
+                })
+        return matches
+    
+    @staticmethod
+    def _fuse(lexical: List[Dict[str, Any]], semantic: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Reciprocal rank fusion: rank-based, so BM25 scores and distances needn't be comparable"""
+        fused = {}
+        for ranking, key in ((lexical, "bm25"), (semantic, "distance")):
+            for rank, match in enumerate(ranking):
+                entry = fused.setdefault(match["id"], {
+                    "id": match["id"],
+                    "text": match["text"],
+                    "filename": match["filename"],
+                    "chunk_index": match["chunk_index"],
+                    "score": 0.0
+                })
+                entry[key] = match["score"] if key == "bm25" else match["distance"]
+                entry["score"] += 1.0 / (RRF_K + rank + 1)
+        return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+    
+    def _backfill_lexical(self):
+        """One-time keyword index build for collections indexed before it existed
+
+        Adds whichever chunks the keyword index lacks, so documents indexed
+        since the upgrade (already in it) don't stop the older ones being added.
+        """
+        if self.catalog.get_meta("lexical_backfilled"):
+            return
+        if self.collection.count() > 0:
+            indexed = self.lexical.ids()
+            missing = [chunk_id for chunk_id in self.collection.get(include=[])['ids'] if chunk_id not in indexed]
+            for start in range(0, len(missing), 500):
+                results = self.collection.get(ids=missing[start:start + 500], include=["documents", "metadatas"])
+                self.lexical.add([
+                    {"id": chunk_id, "document": document, "metadata": metadata}
+                    for chunk_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+                ])
+        self.catalog.set_meta("lexical_backfilled", "1")
+    
+    def list_indexed_documents(self, pattern: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """List indexed documents from the catalog, optionally filtered by a filename glob"""
         try:
-            # Get all items from collection
-            results = self.collection.get()
-            
-            # Extract unique filenames
-            filenames = set()
-            if results['metadatas']:
-                for metadata in results['metadatas']:
-                    filenames.add(metadata['filename'])
-            
-            return {
-                "success": True,
-                "documents": list(filenames),
-                "total_chunks": len(results['ids']) if results['ids'] else 0
-            }
+            self._backfill_catalog()
+            result = self.catalog.list(pattern=pattern, limit=limit, offset=offset)
+            return {"success": True, **result}
         
         except Exception as e:
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+    
+    def _backfill_catalog(self):
+        """One-time catalog rebuild for collections indexed before the catalog existed
+
+        Merges into the catalog rather than requiring it empty: documents indexed
+        since the upgrade already have accurate entries and are left alone.
+        """
+        if self.catalog.get_meta("backfilled"):
+            return
+        if self.collection.count() > 0:
+            # Get all items from collection
+            results = self.collection.get(include=["metadatas"])
+            
+            counts, hashes = {}, {}
+            for metadata in results['metadatas'] or []:
+                counts[metadata['filename']] = counts.get(metadata['filename'], 0) + 1
+                hashes[metadata['filename']] = metadata.get('doc_hash')
+            for filename, count in counts.items():
+                if self.catalog.get(filename) is None:
+                    self.catalog.upsert(filename, count, hashes[filename], None)
+        self.catalog.set_meta("backfilled", "1")
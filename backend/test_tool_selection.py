@@ -0,0 +1,39 @@
+"""Check that every example question in the README is offered a tool that can answer it"""
+import mcp_tools
+
+# Question -> tools it needs; doc_search stands in for files_read when RAG is on
+README_EXAMPLES = {
+    "What's the total revenue by category?": ["sqlite_query"],
+    "Which customer has the most orders?": ["sqlite_query"],
+    "Read the Q1 report and summarize it": ["files_read"],
+    "Compare database numbers to what the report says": ["sqlite_query", "files_read"],
+    "Show me sales trends by channel": ["sqlite_query"],
+    "What's the average order value?": ["sqlite_query"],
+    "What files are available?": ["files_list"],
+    "Read the sales_summary.csv file": ["files_read"],
+    "Summarize the Q1 report": ["files_read"],
+    "Compare database revenue to what the report claims": ["sqlite_query", "files_read"],
+    "Which products are mentioned in files but not in the database?": ["sqlite_query", "files_read"],
+    "Read q1_report.txt": ["files_read"],
+}
+
+def selected(rag: bool, message: str):
+    enabled = mcp_tools.RAG_ENABLED
+    mcp_tools.RAG_ENABLED = rag
+    try:
+        registry = mcp_tools.build_registry()
+    finally:
+        mcp_tools.RAG_ENABLED = enabled
+    return {tool["function"]["name"] for tool in registry.select(message)}
+
+def test_readme_examples():
+    for rag in (False, True):
+        for message, needed in README_EXAMPLES.items():
+            tools = selected(rag, message)
+            for name in needed:
+                ok = name in tools or (rag and name == "files_read" and "doc_search" in tools)
+                assert ok, f"{message!r} (RAG {'on' if rag else 'off'}) lacks {name}: {sorted(tools)}"
+
+if __name__ == "__main__":
+    test_readme_examples()
+    print("All README examples get the tools they need")
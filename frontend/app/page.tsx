@@ -20,6 +20,7 @@ export default function ChatPage() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState<string | null>(null);
 
   const sendMessage = async () => {
     if (!input.trim()) return;
@@ -33,16 +34,17 @@ export default function ChatPage() {
       const response = await fetch(`${API_URL}/api/chat`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
+        // The backend keeps the history for this session, so only send the new message
         body: JSON.stringify({
           message: input,
-          conversation_history: messages.map(m => ({
-            role: m.role,
-            content: m.content
-          }))
+          session_id: sessionId
         })
       });
 
       const data = await response.json();
+      if (data.session_id) {
+        setSessionId(data.session_id);
+      }
       
       const assistantMessage: Message = {
         role: 'assistant',